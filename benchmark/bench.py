@@ -0,0 +1,182 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Times every make stage and build method of the canonical configurations.
+# Each configuration runs in a fresh subprocess so peak RSS is its own.
+#
+# python benchmark/bench.py --save             record benchmark/baseline.json
+# python benchmark/bench.py                    compare against the baseline
+# python benchmark/bench.py bunker_med catwalk only some configurations
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from configs import BUNKERS, COMPONENTS
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def peak_rss_mb():
+    # kilobytes on linux, bytes on mac
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return peak / 1024
+
+def timed(timings, name, call):
+    start = time.perf_counter()
+    result = call()
+    timings[name] = time.perf_counter() - start
+    return result
+
+def record_stages(bp, timings):
+    from skirmishbunker import Instrument
+
+    def record(entry):
+        if entry["kind"] == "stage":
+            timings[f"make.{entry['owner']}.{entry['name']}"] = entry["seconds"]
+
+    bp.instrument = Instrument(callback=record, count_topology=False)
+
+def bench_bunker(bp, timings):
+    record_stages(bp, timings)
+    timed(timings, "make", bp.make)
+    bp.instrument = None
+
+    # every method does its own full build, then all the parts from one
+    bp.memoize_builds = False
+    timed(timings, "build_body", bp.build_body)
+    timed(timings, "build_roof", bp.build_roof)
+    timed(timings, "build_plate", bp.build_plate)
+    bp.memoize_builds = True
+    timed(timings, "build_parts", bp.build_parts)
+
+def bench_component(bp, timings):
+    if hasattr(bp, "stages"):
+        record_stages(bp, timings)
+    timed(timings, "make", bp.make)
+    bp.instrument = None
+    timed(timings, "build", bp.build)
+
+def run_child(name):
+    timings = {}
+
+    if name in BUNKERS:
+        bench_bunker(BUNKERS[name](), timings)
+    else:
+        bench_component(COMPONENTS[name](), timings)
+
+    json.dump({"timings":timings, "peak_rss_mb":peak_rss_mb()}, sys.stdout)
+
+def run_config(name, repeat):
+    '''
+    Best time of repeat runs for each item, worst peak RSS.
+    '''
+    best = {}
+    peak = 0
+
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", name],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        for item, seconds in result["timings"].items():
+            best[item] = min(seconds, best.get(item, seconds))
+        peak = max(peak, result["peak_rss_mb"])
+
+    return {"timings":best, "peak_rss_mb":peak}
+
+def compare(results, baseline, threshold, min_seconds):
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        base = baseline[name]
+        for item, seconds in result["timings"].items():
+            base_seconds = base["timings"].get(item)
+
+            # tiny stages are all noise
+            if base_seconds is None or base_seconds < min_seconds:
+                continue
+
+            if seconds > base_seconds * threshold:
+                regressions.append(f"{name} {item}: {base_seconds:.3f}s -> {seconds:.3f}s")
+
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * threshold:
+            regressions.append(f"{name} peak rss: {base['peak_rss_mb']:.0f}MB -> {result['peak_rss_mb']:.0f}MB")
+
+    return regressions
+
+def print_result(name, result, baseline):
+    base = baseline.get(name, {"timings":{}})
+    print(f"{name}  peak rss {result['peak_rss_mb']:.0f}MB")
+
+    for item, seconds in result["timings"].items():
+        line = f"  {item:<48}{seconds:>9.3f}s"
+        base_seconds = base["timings"].get(item)
+        if base_seconds:
+            line += f"  {seconds / base_seconds:>6.2f}x"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="skirmishbunker benchmarks")
+    parser.add_argument("configs", nargs="*", help="configurations to run, defaults to all")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="fail when an item is this many times slower")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore items faster than this in the baseline")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return 0
+
+    names = args.configs or list(BUNKERS) + list(COMPONENTS)
+    for name in names:
+        if name not in BUNKERS and name not in COMPONENTS:
+            raise Exception(f"Unknown configuration {name}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {}
+    for name in names:
+        results[name] = run_config(name, args.repeat)
+        print_result(name, results[name], baseline)
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f"saved {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.min_seconds)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compare build times for the example configurations under each boolean policy.
+# python benchmark/boolean_policy.py [repeat]
+import sys
+import time
+from skirmishbunker import BooleanPolicy
+from configs import BUNKERS, COMPONENTS
+
+POLICIES = {
+    "serial":BooleanPolicy(parallel=False),
+    "parallel":BooleanPolicy(parallel=True),
+    "parallel_fuzzy":BooleanPolicy(parallel=True, fuzzy=1e-5),
+    "parallel_obb":BooleanPolicy(parallel=True, use_obb=True)
+}
+
+def volume(scene):
+    return sum(shape.Volume() for shape in scene.vals())
+
+def time_build(config, policy, repeat):
+    bp = config()
+    bp.boolean_policy = policy
+    bp.make()
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scene = bp.build()
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best, volume(scene)
+
+def main(repeat=3):
+    configs = dict(BUNKERS)
+    configs.update({name:COMPONENTS[name] for name in ("flat_roof", "detailed_roof", "catwalk")})
+
+    print(f"{'config':<16}{'policy':<16}{'seconds':>10}{'volume':>16}")
+    for name, config in configs.items():
+        for policy_name, policy in POLICIES.items():
+            seconds, vol = time_build(config, policy, repeat)
+            print(f"{name:<16}{policy_name:<16}{seconds:>10.3f}{vol:>16.3f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
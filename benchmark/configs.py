@@ -0,0 +1,146 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Canonical configurations taken from the scripts in example/
+from skirmishbunker import Bunker, FlatRoof, DetailedRoof, Catwalk, Hatch, BlastDoor, SplitDoor
+from cqterrain import tile
+
+def custom_star_tile(bunker):
+    star_tile = tile.star(
+        length = bunker.floor_tile_size,
+        width = bunker.floor_tile_size,
+        height = bunker.floor_tile_height,
+        points = 4,
+        outer_radius = bunker.floor_tile_size/2,
+        inner_radius = 2,
+        padding = .5
+    )
+    return star_tile
+
+# example/bunker_small.py
+def bunker_small():
+    bp = Bunker()
+    bp.inset=10
+    bp.width=75
+    bp.length=75
+    bp.height=65
+
+    bp.panel_length=28
+    bp.panel_width = 5
+    bp.panel_padding = 4
+
+    bp.skip_windows = []
+    bp.window_length = 8
+    bp.window_height = 24
+    bp.window_frame_chamfer = 1.6
+    bp.window_frame_chamfer_select = "<Z"
+
+    bp.door_panels = [0]
+    bp.ladder_panels = [2]
+
+    bp.floor_padding = -5
+    bp.floor_tile_padding=0
+
+    bp.render_pips=True
+    bp.render_magnets=False
+
+    bp.custom_floor_tile = custom_star_tile
+    return bp
+
+# example/bunker_med.py
+def bunker_med():
+    bp = Bunker()
+    bp.inset=15
+    bp.width=140
+    bp.length=110
+    bp.height=65
+
+    bp.panel_length=28
+    bp.panel_width = 5
+    bp.panel_padding = 4
+
+    bp.skip_windows = []
+    bp.window_length = 18
+    bp.window_height = 8
+    bp.window_frame_chamfer = 1.6
+    bp.window_frame_chamfer_select = "<Z"
+
+    bp.door_panels = [0]
+    bp.ladder_panels = [8]
+
+    bp.floor_padding = -5
+    bp.floor_tile_padding=.5
+
+    bp.render_pips=True
+    bp.render_magnets=True
+    return bp
+
+# example/bunker6_test_for_drift.py
+def bunker_drift():
+    bp = bunker_med()
+    bp.floor_tile_padding=.6
+    bp.floor_tile_size=11
+    bp.floor_tile_height = 1
+    return bp
+
+# example/flat_roof.py
+def flat_roof():
+    bp = FlatRoof()
+    bp.roof_chamfer = 10
+    bp.roof_operation = "chamfer"
+    return bp
+
+# example/roof.py
+def detailed_roof():
+    bp = DetailedRoof()
+    bp.length = 82
+    bp.width = 112
+    bp.height = 18
+    bp.inset = -3
+    bp.render_tiles = True
+    bp.render_hatches = True
+    bp.hatch_panels = [0,8]
+    bp.panel_length = 28
+    bp.panel_padding = 4
+    return bp
+
+# example/catwalk.py
+def catwalk():
+    bp = Catwalk()
+    bp.height = 4
+    return bp
+
+def hatch():
+    return Hatch()
+
+def blast_door():
+    return BlastDoor()
+
+def split_door():
+    return SplitDoor()
+
+BUNKERS = {
+    "bunker_small":bunker_small,
+    "bunker_med":bunker_med,
+    "bunker_drift":bunker_drift
+}
+
+COMPONENTS = {
+    "flat_roof":flat_roof,
+    "detailed_roof":detailed_roof,
+    "catwalk":catwalk,
+    "hatch":hatch,
+    "blast_door":blast_door,
+    "split_door":split_door
+}
@@ -0,0 +1,61 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Make and build time against panel count as bunker_med grows from 100mm to 400mm long,
+# under each union_all reduction.
+# python benchmark/scaling.py [repeat]
+import sys
+import time
+from skirmishbunker import BooleanPolicy
+from skirmishbunker.booleans import REDUCTIONS
+from configs import bunker_med
+
+LENGTHS = (100, 150, 200, 250, 300, 350, 400)
+
+def volume(scene):
+    return sum(shape.Volume() for shape in scene.vals())
+
+def time_bunker(length, reduction, repeat):
+    best_make = None
+    best_build = None
+
+    for _ in range(repeat):
+        bp = bunker_med()
+        bp.length = length
+        bp.boolean_policy = BooleanPolicy(reduction=reduction)
+        bp.memoize_builds = False
+
+        start = time.perf_counter()
+        bp.make()
+        made = time.perf_counter()
+        scene = bp.build_body()
+        built = time.perf_counter()
+
+        if best_make is None or made - start < best_make:
+            best_make = made - start
+
+        if best_build is None or built - made < best_build:
+            best_build = built - made
+
+    return len(bp.layout), best_make, best_build, volume(scene)
+
+def main(repeat=1):
+    print(f"{'length':>8}{'panels':>8}{'reduction':>11}{'make':>10}{'build':>10}{'volume':>16}")
+    for length in LENGTHS:
+        for reduction in REDUCTIONS:
+            panels, make_seconds, build_seconds, vol = time_bunker(length, reduction, repeat)
+            print(f"{length:>8}{panels:>8}{reduction:>11}{make_seconds:>10.3f}{build_seconds:>10.3f}{vol:>16.3f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
@@ -0,0 +1,26 @@
+import cadquery as cq
+from skirmishbunker import Bunker, StageCache
+
+bp = Bunker()
+bp.inset=15
+bp.width=140
+bp.length=110
+bp.height=65
+
+bp.skip_windows = []
+bp.window_length = 18
+bp.window_height = 8
+bp.window_frame_chamfer_select = "<Z"
+
+bp.door_panels = [0]
+bp.ladder_panels = [8]
+
+bp.floor_padding = -5
+bp.floor_tile_padding=.5
+
+# re-running this script reads the made stages back from disk
+bp.stage_cache = StageCache('cache', max_size = 256 * 1024 * 1024)
+bp.make()
+
+result = bp.build()
+cq.exporters.export(result,'stl/bunker_cached.stl')
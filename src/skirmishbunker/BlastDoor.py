@@ -16,6 +16,9 @@ import cadquery as cq
 from cadqueryhelper import Base, series
 
 class BlastDoor(Base):
+    # attributes make fills with shapes, left out of params.blueprint_params
+    shape_fields = ("outline", "door", "locking_bars", "handles")
+
     def __init__(self):
         super().__init__()
         self.length=25
@@ -34,6 +37,9 @@ class BlastDoor(Base):
         self.handle_radius = 4
         self.handle_rotation = -15
 
+        # tessellation overrides when exported on its own, see export.export_blueprint
+        self.export_quality = {"blastdoor":"detail"}
+
         self.outline = None
         self.door = None
         self.locking_bars = None
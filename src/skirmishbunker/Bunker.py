@@ -20,14 +20,23 @@ from .SeriesHelper import SeriesHelper
 from math import floor as math_floor
 
 from .bunkerBody import init_body_params, make_wedge, make_interior_rectangle, make_base
-from .bunkerPanels import init_bunker_params, make_cut_panels, arch_detail, make_detail_panels
+from .bunkerPanels import init_bunker_params, make_layout, make_cut_panels, arch_detail, make_detail_panels
 from .bunkerWindows import init_window_params, make_cut_windows, make_windows
 from .bunkerDoors import init_door_params, make_cut_doors, make_doors
 from .bunkerRoof import init_roof_params, make_roof
-from .bunkerFloor import init_floor_params, make_interior_floor
+from .bunkerFloor import init_floor_params, make_interior_floor, fuse_floor_tiles, build_floor_tiles
 from .bunkerLadders import init_ladder_params, make_ladders
 from .bunkerFloorCuts import init_floor_cut, make_floor_cuts
 from .bunkerPips import init_pip_params, make_pips, make_cut_pips
+from .bunkerStages import BUNKER_STAGES
+from .bunkerPreview import make_preview
+from .bunkerBuild import build_body_batched, build_body_parts, BODY_BUILD_PARAMS
+from .booleans import resolve_policy, cut, union
+from .parallelStages import run_stages_parallel
+from .stages import run_stages, memoized, params_snapshot
+from .Instrument import instrumented
+from .brep import shape_state, restore_shape_state, workplane_size
+from .lean import lean_build, release_stages, stage_memory
 
 class Bunker(Base):
     def __init__(self):
@@ -43,6 +52,55 @@ class Bunker(Base):
         init_floor_cut(self)
         init_pip_params(self)
 
+        # optional StageCache shared with the roof
+        self.stage_cache = None
+
+        # optional executor, see parallelStages.make_stage_executor
+        # stages that don't read each other's outputs are made on it at the same time
+        self.stage_executor = None
+
+        # on later make calls only rerun the stages whose params changed
+        self.incremental = False
+        self.stage_snapshots = {}
+
+        # place panels, windows, doors etc as located references to one solid
+        self.instance_series = False
+
+        # swap the detailed parts for box proxies of the same size, for quick layout iterations
+        self.draft = False
+
+        # apply all the body cuts and unions as single multi tool booleans
+        self.batch_booleans = False
+
+        # PrototypeCache for doors, ladders and panel details, None uses the process wide PrototypeCache.default_cache
+        self.prototype_cache = None
+
+        # keep the body and roof solids between build calls until their inputs change,
+        # later calls then return the same shapes
+        self.memoize_builds = False
+        self.build_memo = {}
+
+        # BooleanPolicy for build, None uses booleans.default_policy
+        self.boolean_policy = None
+
+        # optional Instrument, reports time, booleans and topology per stage and build
+        self.instrument = None
+
+        # free the make stage shapes once the outermost build returns, for long running batches
+        self.lean = False
+        self.released = False
+
+        # tessellation overrides per export part, "detail" or a preset name, see export.export_blueprint
+        # the door handles are the small curves worth meshing finely
+        self.export_quality = {"doors":"detail"}
+
+    def __getstate__(self):
+        # workplanes pickle as compressed binary BREP
+        return shape_state(self)
+
+    def __setstate__(self, state):
+        restore_shape_state(self, state)
+
     def make_series(self, shape, length_offset, x_translate = 0, y_translate = 0, z_translate = 0, skip_list = None, keep_list = None):
         series = SeriesHelper()
         series.shape = shape
@@ -56,6 +114,8 @@ class Bunker(Base):
         series.z_translate = z_translate
         series.skip_list = skip_list
         series.keep_list = keep_list
+        series.instance = self.instance_series
+        series.layout = self.layout
         series.make()
 
         return series.get_scene()
@@ -66,92 +126,117 @@ class Bunker(Base):
 
         self.roof_object = roof
 
-    def make(self):
-        super().make()
-        self.angle = roof.angle(self.inset, self.height)
-
-        # order matters
-        make_wedge(self)
-        make_interior_rectangle(self)
-
-        if self.render_base:
-            make_base(self)
-
-        if self.render_cut_panels:
-            # depends on make_interior_rectangle
-            make_cut_panels(self)
+    def release(self):
+        '''
+        Free the make stage shapes, the roof's and the memoized builds.
+        Builds raise until the next make.
+        '''
+        release_stages(self, BUNKER_STAGES)
+
+        if self.roof_bp:
+            self.roof_bp.release()
+
+    def memory_report(self):
+        '''
+        Bytes held per make stage, for the bunker, its memoized builds and its roof.
+        '''
+        report = stage_memory(self, BUNKER_STAGES)
+
+        memo_size = sum(
+            workplane_size(result)
+            for _, result in self.build_memo.values()
+            if isinstance(result, cq.Workplane)
+        )
+        report.append({"owner":type(self).__name__, "stage":"build_memo", "bytes":memo_size})
 
-        if self.render_panel_details:
-            make_detail_panels(self)
+        if self.roof_bp:
+            report.extend(self.roof_bp.memory_report())
 
-        if self.render_windows:
-            make_cut_windows(self)
-            make_windows(self)
+        return report
 
-        if self.render_doors:
-            make_cut_doors(self)
-            make_doors(self)
+    def preview(self):
+        '''
+        Slot layout, feature placement and roof hatch positions
+        worked out from the params alone, nothing is built.
+        '''
+        return make_preview(self)
 
-        if self.render_ladders:
-            make_ladders(self)
+    @instrumented
+    def make(self):
+        super().make()
+        self.released = False
+        self.angle = roof.angle(self.inset, self.height)
 
-        if self.render_roof:
-            make_roof(self)
+        # order matters, see bunkerStages
+        if self.stage_executor:
+            run_stages_parallel(self, BUNKER_STAGES, self.stage_executor)
+        else:
+            run_stages(self, BUNKER_STAGES)
 
-        if self.render_floor_tiles:
-            make_interior_floor(self)
+    @instrumented
+    @lean_build
+    def build_body(self):
+        body = memoized(self, "body", BODY_BUILD_PARAMS, self.__build_body, resolve_policy(self))
 
-        if self.render_floor_cuts:
-            make_floor_cuts(self)
+        # a new workplane each call, build adds the roof to it
+        return cq.Workplane("XY").add(body.vals())
 
-        if self.render_pips:
-            make_pips(self)
-            make_cut_pips(self)
+    def __build_body(self):
+        if self.batch_booleans:
+            return build_body_batched(self)
 
-    def build_body(self):
-        scene = (
-            cq.Workplane("XY")
-            .union(self.wedge)
-        )
+        policy = resolve_policy(self)
+        scene = union(cq.Workplane("XY"), self.wedge, policy)
 
         if self.render_interior:
-            scene = scene.cut(self.interior_rectangle)
+            scene = cut(scene, self.interior_rectangle, policy)
 
         if self.render_base and self.base:
-            scene = scene.union(self.base)
+            scene = union(scene, self.base, policy)
 
         if self.render_cut_panels and self.cut_panels:
-            scene = scene.cut(self.cut_panels)
+            scene = cut(scene, self.cut_panels, policy)
 
         if self.render_pips and self.pips:
             if self.render_magnets:
-                scene = scene.cut(self.pips)
+                scene = cut(scene, self.pips, policy)
             else:
-                scene = scene.union(self.pips)
-            scene = scene.cut(self.cut_pips)
+                scene = union(scene, self.pips, policy)
+            scene = cut(scene, self.cut_pips, policy)
 
         if self.render_windows and self.cut_windows and self.windows:
-            scene = scene.cut(self.cut_windows).union(self.windows)
+            scene = cut(scene, self.cut_windows, policy)
+            scene = union(scene, self.windows, policy)
 
         if self.render_doors and self.cut_doors and self.doors:
-            scene = scene.cut(self.cut_doors).union(self.doors)
+            scene = cut(scene, self.cut_doors, policy)
+            scene = union(scene, self.doors, policy)
 
-        if self.render_floor_tiles and self.interior_tiles:
-            scene = scene.union(self.interior_tiles)
+        if self.render_floor_tiles and self.interior_tiles and fuse_floor_tiles(self):
+            scene = union(scene, self.interior_tiles, policy)
 
         if self.render_floor_cuts and self.floor_cuts:
-            scene = scene.cut(self.floor_cuts)
+            scene = cut(scene, self.floor_cuts, policy)
 
         if self.render_ladders and self.ladders:
-            scene = scene.union(self.ladders)
+            scene = union(scene, self.ladders, policy)
 
         if self.render_panel_details and self.panels:
             scene = scene.add(self.panels)
 
+        if self.render_floor_tiles and self.interior_tiles and not fuse_floor_tiles(self):
+            scene = scene.add(build_floor_tiles(self, policy))
+
         return scene
 
+    def __build_roof_bp(self):
+        bp = self.roof_bp
+        return memoized(self, "roof", ("roof_bp",), bp.build, params_snapshot(bp, bp.build_params), resolve_policy(bp))
+
+    @instrumented
+    @lean_build
     def build_roof(self, z_translate=0):
-        self.roof = self.roof_bp.build().translate((0, 0, z_translate))
+        self.roof = self.__build_roof_bp().translate((0, 0, z_translate))
 
         if self.roof_x_translate != None and self.roof_z_translate:
             self.roof = self.roof.translate((
@@ -162,6 +247,8 @@ class Bunker(Base):
 
         return self.roof
 
+    @instrumented
+    @lean_build
     def build(self):
         super().build()
 
@@ -172,7 +259,7 @@ class Bunker(Base):
 
         return scene
 
-    def build_plate(self):
+    def _calc_plate_x_translate(self):
         x_translate = self.length
 
         if self.inset < 0:
@@ -180,8 +267,63 @@ class Bunker(Base):
         if self.inset == 0:
             x_translate = self.length + 15
 
+        return x_translate
+
+    @instrumented
+    @lean_build
+    def build_plate(self):
         if self.render_roof and self.roof_bp:
-            self.roof_x_translate = x_translate
+            self.roof_x_translate = self._calc_plate_x_translate()
             self.roof_z_translate = -1 * (self.height + self.base_height)
 
         return self.build()
+
+    @instrumented
+    @lean_build
+    def build_parts(self):
+        '''
+        Body, roof, assembled bunker and print plate from one body and one roof build.
+        roof is None when there is no roof, roof_x_translate and roof_z_translate aren't changed.
+        '''
+        super().build()
+
+        parts = {
+            "body":self.build_body(),
+            "roof":None,
+            "assembled":self.build_body(),
+            "plate":self.build_body()
+        }
+
+        if self.render_roof and self.roof_bp:
+            roof = self.__build_roof_bp()
+            roof_z = self.height/2+self.roof_bp.height/2
+
+            parts["roof"] = cq.Workplane("XY").add(roof.vals())
+            parts["assembled"].add(roof.translate((0, 0, roof_z)))
+            parts["plate"].add(roof.translate((
+                self._calc_plate_x_translate(),
+                0,
+                roof_z - (self.height + self.base_height)
+            )))
+
+        return parts
+
+    @instrumented
+    @lean_build
+    def build_export_parts(self):
+        '''
+        Named parts laid out as on the print plate. The body is split into
+        the body and its features, see bunkerBuild.build_body_parts.
+        '''
+        super().build()
+        parts = build_body_parts(self)
+
+        if self.render_roof and self.roof_bp:
+            roof_z = self.height/2+self.roof_bp.height/2
+            parts["roof"] = self.__build_roof_bp().translate((
+                self._calc_plate_x_translate(),
+                0,
+                roof_z - (self.height + self.base_height)
+            ))
+
+        return parts
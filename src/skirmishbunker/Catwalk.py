@@ -14,8 +14,29 @@
 
 import cadquery as cq
 from cadqueryhelper import Base, shape, grid, series
+from .booleans import resolve_policy, cut, union, union_all
+from .stages import Stage, run_stages
+from .Instrument import instrumented
+from .brep import shape_state, restore_shape_state
+from .lean import lean_build, release_stages, stage_memory
+from .draft import proxy_box
+from operator import methodcaller
 import math
 
+PLATFORM_PARAMS = (
+    "length", "width", "height", "interior_length", "interior_width",
+    "interior_height", "interior_overlap", "fit_padding"
+)
+
+MAGNET_PARAMS = ("height", "interior_length", "interior_width", "magnet_radius", "magnet_height", "magnet_padding")
+
+WALL_PARAMS = ("length", "width", "height", "wall_length", "wall_width", "wall_height", "draft")
+
+FLOOR_PARAMS = (
+    "length", "width", "height", "interior_length", "interior_width",
+    "fit_padding", "floor_height", "floor_tile_size", "floor_tile_padding", "draft"
+)
+
 class Catwalk(Base):
     def __init__(self):
         super().__init__()
@@ -45,11 +66,53 @@ class Catwalk(Base):
         self.floor_tile_size = 12
         self.floor_tile_padding = 2
 
+        # plain walls and one floor slab instead of the arches and diamonds, for quick layout iterations
+        self.draft = False
+
+        # optional StageCache
+        self.stage_cache = None
+
+        # on later make calls only rerun the stages whose params changed
+        self.incremental = False
+        self.stage_snapshots = {}
+
+        # BooleanPolicy for build, None uses booleans.default_policy
+        self.boolean_policy = None
+
+        # optional Instrument, reports time, booleans and topology per stage and build
+        self.instrument = None
+
+        # free the make stage shapes once the outermost build returns, for long running batches
+        self.lean = False
+        self.released = False
+
+        # tessellation overrides per export part, see export.export_blueprint
+        self.export_quality = {}
+
         self.platform = None
         self.cut_magnets = None
         self.corner_walls = None
         self.floor_tiles = None
 
+    def release(self):
+        '''
+        Free the make stage shapes, builds raise until the next make.
+        '''
+        release_stages(self, self.stages)
+
+    def memory_report(self):
+        '''
+        Bytes held per make stage.
+        '''
+        return stage_memory(self, self.stages)
+
+    def __getstate__(self):
+        # workplanes pickle as compressed binary BREP
+        return shape_state(self)
+
+    def __setstate__(self, state):
+        restore_shape_state(self, state)
+
     def __make_platform(self):
         platform = (
             cq.Workplane("XY")
@@ -95,16 +158,19 @@ class Catwalk(Base):
         y_translate = self.interior_width/2-self.magnet_radius-self.magnet_padding
         z_translate = -1*(self.height/2 - self.magnet_height/2)
 
-        pips = (
-            cq.Workplane("XY")
-            .union(magnet.translate((x_translate, y_translate, z_translate)))
-            .union(magnet.translate((-1*x_translate, y_translate, z_translate)))
-            .union(magnet.translate((-1*x_translate, -1*y_translate, z_translate)))
-            .union(magnet.translate((x_translate, -1*y_translate, z_translate)))
-        )
+        pips = union_all([
+            magnet.translate((x_translate, y_translate, z_translate)),
+            magnet.translate((-1*x_translate, y_translate, z_translate)),
+            magnet.translate((-1*x_translate, -1*y_translate, z_translate)),
+            magnet.translate((x_translate, -1*y_translate, z_translate))
+        ], resolve_policy(self))
         self.cut_magnets = pips
 
     def __make_corner_walls(self):
+        if self.draft:
+            self.corner_walls = self.__make_corners(proxy_box(self.wall_length, self.wall_width, self.wall_height))
+            return
+
         wall = (
             cq.Workplane("XY")
             .box(
@@ -131,51 +197,53 @@ class Catwalk(Base):
         arch_cuts = series(arch_cut, length_offset=2.7, size=cut_size, operation=arch_cut_operation)
         wall = wall.cut(arch_cuts)
 
-        corner = (
-            cq.Workplane("XY")
-            .union(wall.translate((-1*(self.wall_length/2-self.wall_width/2),0,0)))
-            .union(
-                wall
-                .translate((-1*(self.wall_length/2-self.wall_width/2),0,0))
-                .rotate((0,0,1),(0,0,0),90)
-            )
-            .translate((
-                0,#s,
-                0,#-1*(self.width/2-self.wall_width/2),
-                self.wall_height/2+self.height/2
-            ))
-        )
+        self.corner_walls = self.__make_corners(wall)
+        #self.corner_walls = arch_cut
+
+    def __make_corners(self, wall):
+        policy = resolve_policy(self)
+        wall = wall.translate((-1*(self.wall_length/2-self.wall_width/2),0,0))
+        corner = union_all([
+            wall,
+            wall.rotate((0,0,1),(0,0,0),90)
+        ], policy).translate((
+            0,#s,
+            0,#-1*(self.width/2-self.wall_width/2),
+            self.wall_height/2+self.height/2
+        ))
 
         x_translate = self.length/2-self.wall_width/2
         y_translate = -1*(self.width/2-self.wall_width/2)
 
-        corners = (
-            cq.Workplane("XY")
-            .union(corner).translate((x_translate,y_translate,0))
-            .union(corner.rotate((0,0,1),(0,0,0), 90).translate((-1*x_translate,y_translate,0)))
-            .union(corner.rotate((0,0,1),(0,0,0), 180).translate((-1*x_translate,-1*y_translate,0)))
-            .union(corner.rotate((0,0,1),(0,0,0), -90).translate((x_translate,-1*y_translate,0)))
-        )
-        self.corner_walls = corners
-        #self.corner_walls = arch_cut
+        corners = union_all([
+            corner.translate((x_translate,y_translate,0)),
+            corner.rotate((0,0,1),(0,0,0), 90).translate((-1*x_translate,y_translate,0)),
+            corner.rotate((0,0,1),(0,0,0), 180).translate((-1*x_translate,-1*y_translate,0)),
+            corner.rotate((0,0,1),(0,0,0), -90).translate((x_translate,-1*y_translate,0))
+        ], policy)
+        return corners
 
     def __make_floor_tiles(self):
-        diamond = shape.diamond(
-            self.floor_tile_size,
-            self.floor_tile_size,
-            self.floor_height
-        ).faces("-Z").chamfer(.4)
-
-        rows = math.floor((self.length-self.height) / (self.floor_tile_size+self.floor_tile_padding))
-        colums = math.floor((self.width-self.height) / ((self.floor_tile_size+self.floor_tile_padding)/2))
-
-        diamonds = grid.make_grid(
-            diamond,
-            [self.floor_tile_size+self.floor_tile_padding, (self.floor_tile_size+self.floor_tile_padding)/2],
-            rows = rows+2,
-            columns = colums,
-            odd_col_push = [(self.floor_tile_size+self.floor_tile_padding)/2,0]
-        )
+        if self.draft:
+            # the diamonds cover the whole walkway, the walkway cut trims the slab the same way
+            diamonds = proxy_box(self.length-self.height, self.width-self.height, self.floor_height)
+        else:
+            diamond = shape.diamond(
+                self.floor_tile_size,
+                self.floor_tile_size,
+                self.floor_height
+            ).faces("-Z").chamfer(.4)
+
+            rows = math.floor((self.length-self.height) / (self.floor_tile_size+self.floor_tile_padding))
+            colums = math.floor((self.width-self.height) / ((self.floor_tile_size+self.floor_tile_padding)/2))
+
+            diamonds = grid.make_grid(
+                diamond,
+                [self.floor_tile_size+self.floor_tile_padding, (self.floor_tile_size+self.floor_tile_padding)/2],
+                rows = rows+2,
+                columns = colums,
+                odd_col_push = [(self.floor_tile_size+self.floor_tile_padding)/2,0]
+            )
 
         outline = (
             cq.Workplane("XY")
@@ -211,34 +279,35 @@ class Catwalk(Base):
         #self.floor_tiles = floor_tiles
 
 
+    # order matters
+    stages = [
+        Stage("platform", methodcaller("_Catwalk__make_platform"), PLATFORM_PARAMS, ("platform",)),
+        Stage("magnet_cuts", methodcaller("_Catwalk__make_magnet_cuts"), MAGNET_PARAMS, ("cut_magnets",), render="render_magnets", policy=True),
+        Stage("corner_walls", methodcaller("_Catwalk__make_corner_walls"), WALL_PARAMS, ("corner_walls",), render="render_corner_walls", policy=True),
+        Stage("floor_tiles", methodcaller("_Catwalk__make_floor_tiles"), FLOOR_PARAMS, ("floor_tiles",), render="render_floor")
+    ]
+
+    @instrumented
     def make(self):
         super().make()
-        self.__make_platform()
-
-        if self.render_magnets:
-            self.__make_magnet_cuts()
-
-        if self.render_corner_walls:
-            self.__make_corner_walls()
-
-        if self.render_floor:
-            self.__make_floor_tiles()
+        self.released = False
+        run_stages(self, self.stages)
 
+    @instrumented
+    @lean_build
     def build(self):
         super().build()
-        scene = (
-            cq.Workplane("XY")
-            .union(self.platform)
-        )
+        policy = resolve_policy(self)
+        scene = union(cq.Workplane("XY"), self.platform, policy)
 
         if self.render_magnets and self.cut_magnets:
-            scene = scene.cut(self.cut_magnets)
+            scene = cut(scene, self.cut_magnets, policy)
 
         if self.render_corner_walls and self.corner_walls:
-            scene = scene.union(self.corner_walls)
+            scene = union(scene, self.corner_walls, policy)
 
         if self.render_floor and self.floor_tiles:
-            scene = scene.cut(self.floor_tiles)
+            scene = cut(scene, self.floor_tiles, policy)
 
         return scene
 
@@ -13,10 +13,23 @@
 # limitations under the License.
 
 import cadquery as cq
-from .FlatRoof import FlatRoof
+from .FlatRoof import FlatRoof, HATCH_SPACE_PARAMS, BUILD_PARAMS
+from .stages import Stage
+from .booleans import resolve_policy, cut, union, union_all
+from .Instrument import instrumented
+from .lean import lean_build
+from .draft import bounding_proxy
 from cadqueryhelper import series, grid
 from cqterrain import roof
 from math import floor as math_floor
+from operator import methodcaller
+
+BODY_PARAMS = ("length", "width", "height", "inset", "wall_width")
+
+WALL_PARAMS = BODY_PARAMS + (
+    "wall_details_length", "wall_details_space", "wall_details_inset",
+    "wall_details_depth", "wall_details_pillar_depth", "wall_arch_fillet", "draft"
+)
 
 class DetailedRoof(FlatRoof):
     def __init__(self):
@@ -140,13 +153,12 @@ class DetailedRoof(FlatRoof):
             .translate((x_translate,0,1))
         )
 
-        self.cut_walls = (
-            cq.Workplane("XY")
-            .union(x_wall_cut)
-            .union(x_wall_cut.rotate((0,0,1),(0,0,0),180))
-            .union(y_wall_cut)
-            .union(y_wall_cut.rotate((0,0,1),(0,0,0),180))
-        )
+        self.cut_walls = union_all([
+            x_wall_cut,
+            x_wall_cut.rotate((0,0,1),(0,0,0),180),
+            y_wall_cut,
+            y_wall_cut.rotate((0,0,1),(0,0,0),180)
+        ], resolve_policy(self))
 
 
     def __make_wall_details(self):
@@ -155,13 +167,16 @@ class DetailedRoof(FlatRoof):
             .faces("X or -X")
             .box(4, self.wall_details_pillar_depth, self.height))
 
-        arch = (cq.Workplane("XY")
-            .box(self.wall_details_length - self.wall_details_depth, 5, ((self.height+1) /4)*3)
-            .faces("Z")
-            .edges("Y")
-            .fillet(self.wall_arch_fillet))
+        if self.draft:
+            wall_detail = bounding_proxy(detail)
+        else:
+            arch = (cq.Workplane("XY")
+                .box(self.wall_details_length - self.wall_details_depth, 5, ((self.height+1) /4)*3)
+                .faces("Z")
+                .edges("Y")
+                .fillet(self.wall_arch_fillet))
 
-        wall_detail = detail.cut(arch)
+            wall_detail = detail.cut(arch)
 
         x_size = math_floor((self.length - self.inset * 2) / 24)
         y_size = math_floor((self.width - self.inset * 2) / 24)
@@ -175,25 +190,24 @@ class DetailedRoof(FlatRoof):
         y_translate = -1*(self.width/2 - self.wall_details_pillar_depth/2)+self.inset +1
         x_translate = -1*(self.length/2 - self.wall_details_pillar_depth/2)+self.inset +1
 
-        x_plus = (cq.Workplane("XY")
-            .union(y_series)
-            .translate((x_translate,0,0)))
+        x_plus = y_series.translate((x_translate,0,0))
+        y_plus = x_series.translate((0,y_translate,0))
 
-        y_plus = (cq.Workplane("XY")
-            .union(x_series)
-            .translate((0,y_translate,0)))
-
-        self.wall_details = (
-            cq.Workplane("XY")
-            .union(x_plus)
-            .union(x_plus.rotate((0,0,1),(0,0,0),180))
-            .union(y_plus)
-            .union(y_plus.rotate((0,0,1),(0,0,0),180))
-        )
+        # every pillar in one fuse rather than a union per side
+        self.wall_details = union_all([
+            x_plus,
+            x_plus.rotate((0,0,1),(0,0,0),180),
+            y_plus,
+            y_plus.rotate((0,0,1),(0,0,0),180)
+        ], resolve_policy(self))
 
 
     #@todo discussion point - this is a hack until I can figure out why the FlatRoof tile generator created different results.
     def _make_tiles(self):
+        # the pattern relief measured slower here, the later wall booleans dominate
+        if self.tile_mode != "grid":
+            raise Exception(f"DetailedRoof only supports tile_mode grid, not {self.tile_mode}")
+
         tile_size = 21
         tile_padding = 2
         tile_height = self.tile_height
@@ -201,6 +215,15 @@ class DetailedRoof(FlatRoof):
         int_length = self.length-(2*(self.inset+self.wall_width))
         int_width = self.width-(2*(self.inset+self.wall_width))
 
+        if self.draft:
+            self.tiles = self._make_draft_tiles(
+                tile_size,
+                tile_size + tile_padding,
+                math_floor(int_width/(tile_size + tile_padding)),
+                math_floor(int_length/(tile_size + tile_padding))
+            )
+            return
+
         tile = cq.Workplane("XY").box(tile_size, tile_size, tile_height)
         slot = cq.Workplane("XY").slot2D(tile_size,2).extrude(tile_height).rotate((0,0,1),(0,0,0),45)
         slot2 = cq.Workplane("XY").slot2D(tile_size-7,2).extrude(tile_height).rotate((0,0,1),(0,0,0),45).translate((-3,-3,0))
@@ -217,26 +240,48 @@ class DetailedRoof(FlatRoof):
         self.tiles = tile_grid.translate((0,0,self._calc_tile_z_translate()))
 
 
+    # order matters
+    stages = [
+        Stage("roof_body", methodcaller("_make_roof_body"), BODY_PARAMS, ("outline", "roof_body")),
+        Stage("tiles", methodcaller("_make_tiles"), BODY_PARAMS + ("tile_height", "tile_z_offset", "tile_mode", "draft"), ("tiles",), render="render_tiles"),
+        Stage(
+            "hatches",
+            methodcaller("_FlatRoof__make_hatches"),
+            HATCH_SPACE_PARAMS + ("wall_width", "hatch_length", "hatch_width", "hatch_height", "hatch_radius", "draft"),
+            ("hatches",),
+            render="render_hatches"
+        ),
+        Stage(
+            "cut_hatches",
+            methodcaller("_FlatRoof__make_cut_hatches"),
+            HATCH_SPACE_PARAMS + ("hatch_length", "hatch_width", "hatch_cut_inset", "hatch_cut_chamfer", "wall_width", "tile_height"),
+            ("cut_hatches",),
+            render="render_hatch_cuts"
+        ),
+        Stage("holes", methodcaller("make_hole_cuts"), BODY_PARAMS + ("hole_radius", "hole_inset", "hole_depth"), ("holes",), render="cut_holes", policy=True),
+        Stage("wall_cuts", methodcaller("_DetailedRoof__make_wall_cuts"), WALL_PARAMS, ("cut_walls",), policy=True),
+        Stage("wall_details", methodcaller("_DetailedRoof__make_wall_details"), WALL_PARAMS, ("wall_details",), policy=True)
+    ]
+
+    build_params = BUILD_PARAMS + ("cut_walls", "wall_details")
+
     def make(self):
         super().make()
-
         self.angle = roof.angle(self.inset, self.height)
-        self.__make_wall_cuts()
-        self.__make_wall_details()
 
 
+    @instrumented
+    @lean_build
     def build(self):
         result = super().build()
+        policy = resolve_policy(self)
 
-        result = (
-            cq.Workplane("XY")
-            .union(result)
-            .cut(self.cut_walls)
-            .union(self.wall_details)
-        )
+        result = union(cq.Workplane("XY"), result, policy)
+        result = cut(result, self.cut_walls, policy)
+        result = union(result, self.wall_details, policy)
 
         # Re-cut holes as they will have been filled
         if self.cut_holes and self.holes:
-            result = result.cut(self.holes)
+            result = cut(result, self.holes, policy)
 
         return result
@@ -15,8 +15,34 @@
 import cadquery as cq
 from .Hatch import Hatch
 from .SeriesHelper import SeriesHelper
+from .stages import Stage, run_stages
+from .booleans import resolve_policy, cut, union, union_all
+from .Instrument import instrumented
+from .brep import shape_state, restore_shape_state
+from .lean import lean_build, release_stages, stage_memory
+from .relief import pattern_faces, find_host, relief
+from .draft import proxy_box, grid_proxy
+from .PrototypeCache import prototype
 from cadqueryhelper import Base, series, grid
+from OCP.BRepPrimAPI import BRepPrimAPI_MakePrism
 from math import floor as math_floor
+from operator import methodcaller
+
+TILE_MODES = ("grid", "pattern")
+
+SPACE_PARAMS = ("length", "width", "height", "inset", "roof_chamfer")
+
+HATCH_SPACE_PARAMS = SPACE_PARAMS + (
+    "bunker_int_length", "bunker_int_width",
+    "panel_length", "panel_padding", "hatch_panels", "instance_series"
+)
+
+# everything build reads
+BUILD_PARAMS = (
+    "render_tiles", "tile_mode", "tile_z_offset", "draft",
+    "render_hatch_cuts", "render_hatches", "cut_holes", "boolean_policy",
+    "roof_body", "tiles", "cut_hatches", "hatches", "holes"
+)
 
 class FlatRoof(Base):
     def __init__(self):
@@ -48,6 +74,9 @@ class FlatRoof(Base):
         self.tile_height = 1.5
         # less then -1 results in a cut
         self.tile_z_offset = -1
+        # grid - a grid of tile solids unioned or cut into the roof
+        # pattern - the tiles are drawn as 2D faces and raised or sunk into the roof top without a boolean
+        self.tile_mode = "grid"
 
         # Hatches
         self.render_hatches = False
@@ -61,6 +90,15 @@ class FlatRoof(Base):
         self.hatch_cut_chamfer = 2
         self.hatch_z_translate = 0
 
+        # place hatches as located references to one solid
+        self.instance_series = False
+
+        # box proxies for the tiles and hatches, for quick layout iterations
+        self.draft = False
+
+        # PrototypeCache for the hatch, None uses the process wide PrototypeCache.default_cache
+        self.prototype_cache = None
+
         # Pip/Magnet holes
         self.cut_holes = False
         self.hole_inset = 1.5
@@ -68,6 +106,27 @@ class FlatRoof(Base):
         #@todo discussion point - I would prefer if this radius.
         self.hole_radius = 1
 
+        # optional StageCache
+        self.stage_cache = None
+
+        # on later make calls only rerun the stages whose params changed
+        self.incremental = False
+        self.stage_snapshots = {}
+
+        # BooleanPolicy for build, None uses booleans.default_policy
+        self.boolean_policy = None
+
+        # optional Instrument, reports time, booleans and topology per stage and build
+        self.instrument = None
+
+        # free the make stage shapes once the outermost build returns, for long running batches
+        self.lean = False
+        self.released = False
+
+        # tessellation overrides per export part, see export.export_blueprint
+        # a roof rendering hatches uses "detail" unless set here
+        self.export_quality = {}
+
         #shapes
         self.roof_body = None
         self.tiles = None
@@ -75,6 +134,25 @@ class FlatRoof(Base):
         self.cut_hatches = None
         self.holes = None
 
+    def release(self):
+        '''
+        Free the make stage shapes, builds raise until the next make.
+        '''
+        release_stages(self, self.stages)
+
+    def memory_report(self):
+        '''
+        Bytes held per make stage.
+        '''
+        return stage_memory(self, self.stages)
+
+    def __getstate__(self):
+        # workplanes pickle as compressed binary BREP
+        return shape_state(self)
+
+    def __setstate__(self, state):
+        restore_shape_state(self, state)
+
     def __should_cut_tiles(self):
         if self.tile_z_offset < -1:
             return True
@@ -113,6 +191,17 @@ class FlatRoof(Base):
 
         return translate
 
+    def _calc_tile_base_z(self):
+        # pattern tiles are drawn on the face they stand on or are sunk from
+        if self.__should_cut_tiles():
+            return self._calc_tile_z_translate() + self.tile_height / 2
+        return self._calc_tile_z_translate() - self.tile_height / 2
+
+    def _calc_tile_pattern_height(self):
+        if self.__should_cut_tiles():
+            return -1 * self.tile_height
+        return self.tile_height
+
     def _calc_hatch_space_length(self):
         length = self.length
         length -= 2 * self.inset
@@ -203,9 +292,26 @@ class FlatRoof(Base):
         self.roof_body = roof_body
 
     def _make_tiles(self):
+        if self.tile_mode not in TILE_MODES:
+            raise Exception(f"Invalid tile_mode {self.tile_mode}")
+
         length = self._calc_tile_space_length()
         width = self._calc_tile_space_width()
         tile_space = self._calc_tile_spacing()
+
+        if self.draft:
+            self.tiles = self._make_draft_tiles(
+                self.tile_size,
+                tile_space,
+                math_floor(width / (tile_space)),
+                math_floor(length / (tile_space))
+            )
+            return
+
+        if self.tile_mode == "pattern":
+            self.tiles = self._make_tile_pattern(self._make_tile_face())
+            return
+
         slot_translate = self._calc_slot_translation()
         slot_radius = self._calc_slot_radius()
         slot_length_md = self._calc_slot_length_md()
@@ -265,6 +371,99 @@ class FlatRoof(Base):
 
         self.tiles = tile_grid.translate((0, 0, self._calc_tile_z_translate()))
 
+    def _make_draft_tiles(self, tile_size, tile_space, columns, rows):
+        '''
+        One slab over the whole tile grid.
+        '''
+        tile = proxy_box(tile_size, tile_size, self.tile_height)
+        tiles = grid_proxy(tile, [tile_space, tile_space], columns, rows)
+
+        if tiles is None:
+            return None
+
+        return tiles.translate((0, 0, self._calc_tile_z_translate()))
+
+    def _make_tile_face(self):
+        slot_translate = self._calc_slot_translation()
+        slot_radius = self._calc_slot_radius()
+        slot_length_md = self._calc_slot_length_md()
+        slot_length_sm = self._calc_slot_length_sm()
+
+        slots = [
+            (self.tile_size, 0),
+            (slot_length_md, -1 * slot_translate),
+            (slot_length_md, slot_translate),
+            (slot_length_sm, -2 * slot_translate),
+            (slot_length_sm, 2 * slot_translate)
+        ]
+
+        tile = cq.Face.makeFromWires(cq.Workplane("XY").rect(self.tile_size, self.tile_size).val())
+        slot_faces = []
+
+        for length, translate in slots:
+            slot = (cq.Workplane("XY")
+                .slot2D(length, slot_radius)
+                .rotate((0, 0, 1), (0, 0, 0), 45)
+                .translate((translate, translate, 0))
+                .val())
+            slot_faces.append(cq.Face.makeFromWires(slot))
+
+        return tile.cut(*slot_faces).Faces()
+
+    def _make_tile_pattern(self, faces):
+        '''
+        Lay the tile faces out on the same centred grid as grid.make_grid,
+        every tile is a located reference to the one set of faces.
+        '''
+        length = self._calc_tile_space_length()
+        width = self._calc_tile_space_width()
+        tile_space = self._calc_tile_spacing()
+
+        columns = math_floor(width / tile_space)
+        rows = math_floor(length / tile_space)
+        z = self._calc_tile_base_z()
+
+        tiles = []
+        for row in range(rows):
+            for column in range(columns):
+                location = cq.Location(cq.Vector(
+                    tile_space * (row - (rows - 1) / 2),
+                    tile_space * (column - (columns - 1) / 2),
+                    z
+                ))
+                tiles.extend(face.moved(location) for face in faces)
+
+        return cq.Workplane("XY").add(cq.Compound.makeCompound(tiles))
+
+    def _make_tile_solids(self):
+        '''
+        The pattern extruded into the same tile solids the grid mode makes.
+        '''
+        pattern = cq.Compound.makeCompound(pattern_faces(self.tiles))
+        height = cq.Vector(0, 0, self._calc_tile_pattern_height())
+        return cq.Workplane("XY").add(cq.Shape.cast(BRepPrimAPI_MakePrism(pattern.wrapped, height.wrapped).Shape()))
+
+    def _relief_tile_pattern(self, scene):
+        '''
+        Raise or sink the pattern into the roof without a boolean.
+        None when the roof isn't a single solid with a flat face under the pattern.
+        '''
+        solids = scene.solids().vals()
+        faces = pattern_faces(self.tiles)
+
+        if len(solids) != 1 or len(faces) == 0:
+            return None
+
+        host = find_host(solids[0], faces, self._calc_tile_base_z())
+        if host is None:
+            return None
+
+        result = relief(solids[0], [(host, faces)], self._calc_tile_pattern_height())
+        if result is None:
+            return None
+
+        return cq.Workplane("XY").add(result[0])
+
     def __make_cut_hatches(self):
         int_length = self._calc_hatch_space_length()
         int_width = self._calc_hatch_space_width()
@@ -310,6 +509,7 @@ class FlatRoof(Base):
         series.y_translate = (int_width / 2) - (cut_width / 2)
         series.z_translate = 0
         series.keep_list = self.hatch_panels
+        series.instance = self.instance_series
         series.make()
 
         self.cut_hatches = series.get_scene()
@@ -331,9 +531,16 @@ class FlatRoof(Base):
         bp.width = self.hatch_width
         bp.height = self.hatch_height
         bp.hatch_radius = self.hatch_radius
-        bp.make()
 
-        hatch = bp.build()
+        if self.draft:
+            hatch = proxy_box(bp.length, bp.width, bp.height)
+        else:
+            hatch = prototype(
+                self,
+                "Hatch",
+                (bp.length, bp.width, bp.height, bp.hatch_radius),
+                lambda: self.__build_hatch(bp)
+            )
 
         series = SeriesHelper()
         series.shape = hatch
@@ -346,10 +553,15 @@ class FlatRoof(Base):
         series.y_translate = (int_width / 2) - (bp.width / 2)
         series.z_translate = z_translate
         series.keep_list = self.hatch_panels
+        series.instance = self.instance_series
         series.make()
 
         self.hatches = series.get_scene()
 
+    def __build_hatch(self, bp):
+        bp.make()
+        return bp.build()
+
     def make_hole_cuts(self):
         x_translate = self._calc_hole_x_translate()
         y_translate = self._calc_hole_y_translate()
@@ -361,57 +573,96 @@ class FlatRoof(Base):
             self.hole_radius
         )
 
-        holes = (
-            cq.Workplane("XY")
-            .union(hole.translate((x_translate, y_translate, z_translate)))
-            .union(hole.translate((-1 * x_translate, y_translate, z_translate)))
-            .union(hole.translate((-1 * x_translate, -1 * y_translate, z_translate)))
-            .union(hole.translate((x_translate, -1 * y_translate, z_translate)))
-        )
+        holes = union_all([
+            hole.translate((x_translate, y_translate, z_translate)),
+            hole.translate((-1 * x_translate, y_translate, z_translate)),
+            hole.translate((-1 * x_translate, -1 * y_translate, z_translate)),
+            hole.translate((x_translate, -1 * y_translate, z_translate))
+        ], resolve_policy(self))
 
         self.holes = holes
 
-    def make(self):
-        super().make()
-
-        self._make_roof_body()
-
-        if self.render_tiles:
-            self._make_tiles()
-
-        if self.render_hatches:
-            self.__make_hatches()
+    # order matters
+    stages = [
+        Stage(
+            "roof_body",
+            methodcaller("_make_roof_body"),
+            SPACE_PARAMS + ("roof_chamfer_faces_selector", "roof_chamfer_edges_selector", "roof_operation"),
+            ("roof_body",)
+        ),
+        Stage(
+            "tiles",
+            methodcaller("_make_tiles"),
+            SPACE_PARAMS + ("tile_size", "tile_padding", "tile_height", "tile_z_offset", "tile_mode", "draft"),
+            ("tiles",),
+            render="render_tiles"
+        ),
+        Stage(
+            "hatches",
+            methodcaller("_FlatRoof__make_hatches"),
+            HATCH_SPACE_PARAMS + ("hatch_length", "hatch_width", "hatch_height", "hatch_radius", "draft"),
+            ("hatches",),
+            render="render_hatches"
+        ),
+        Stage(
+            "cut_hatches",
+            methodcaller("_FlatRoof__make_cut_hatches"),
+            HATCH_SPACE_PARAMS + ("hatch_length", "hatch_width", "hatch_cut_inset", "hatch_cut_chamfer", "wall_width", "tile_height"),
+            ("cut_hatches",),
+            render="render_hatch_cuts"
+        ),
+        Stage(
+            "holes",
+            methodcaller("make_hole_cuts"),
+            SPACE_PARAMS + ("hole_radius", "hole_inset", "hole_depth"),
+            ("holes",),
+            render="cut_holes",
+            policy=True
+        )
+    ]
 
-        if self.render_hatch_cuts:
-            self.__make_cut_hatches()
+    build_params = BUILD_PARAMS
 
-        if self.cut_holes:
-            self.make_hole_cuts()
+    @instrumented
+    def make(self):
+        super().make()
+        self.released = False
+        run_stages(self, self.stages)
 
+    @instrumented
+    @lean_build
     def build(self):
         super().build()
 
         tiles = self.render_tiles
         cut_tiles = self.__should_cut_tiles()
+        policy = resolve_policy(self)
 
-        result = (
-            cq.Workplane("XY")
-            .union(self.roof_body)
-        )
+        result = union(cq.Workplane("XY"), self.roof_body, policy)
+        tile_solids = self.tiles
+
+        if tiles and self.tiles and self.tile_mode == "pattern" and not self.draft:
+            relief_result = self._relief_tile_pattern(result)
+
+            if relief_result is not None:
+                result = relief_result
+                tiles = False
+            else:
+                tile_solids = self._make_tile_solids()
 
         if tiles and self.tiles and cut_tiles == True:
-            result = result.cut(self.tiles)
+            result = cut(result, tile_solids, policy)
         elif tiles and self.tiles:
-            result = result.union(self.tiles)
+            result = union(result, tile_solids, policy)
 
         if self.render_hatch_cuts and self.cut_hatches:
-            result = result.cut(self.cut_hatches)
+            result = cut(result, self.cut_hatches, policy)
 
         if self.render_hatches and self.hatches:
             result = result.add(self.hatches)
 
         if self.cut_holes and self.holes:
-            result = result.cut(self.holes)
+            result = cut(result, self.holes, policy)
 
         #return self.cut_hatches.union(self.tiles).add(self.hatches)
         #return self.holes
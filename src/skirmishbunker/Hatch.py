@@ -16,6 +16,9 @@ import cadquery as cq
 from cadqueryhelper import Base
 
 class Hatch(Base):
+    # attributes make fills with shapes, left out of params.blueprint_params
+    shape_fields = ("outline", "hatch_cut", "hatch", "base", "hinge")
+
     def __init__(self):
         self.length = 25
         self.width = 25
@@ -32,6 +35,9 @@ class Hatch(Base):
         self.inner_ring_width = 2.5
         self.cut_out_chamfer = 0.3
 
+        # tessellation overrides when exported on its own, see export.export_blueprint
+        self.export_quality = {"hatch":"detail"}
+
         self.outline = None
         self.hatch_cut = None
         self.hatch  = None
@@ -0,0 +1,209 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+from . import booleans
+
+# number of OCC booleans run while any instrument is measuring
+_boolean_count = 0
+_active = 0
+_originals = {}
+
+def _counting(function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        global _boolean_count
+        _boolean_count += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+def _start_counting():
+    global _active
+    if _active == 0:
+        _originals["shape"] = cq.Shape._bool_op
+        _originals["booleans"] = booleans._bool_op
+        cq.Shape._bool_op = _counting(cq.Shape._bool_op)
+        booleans._bool_op = _counting(booleans._bool_op)
+    _active += 1
+
+def _stop_counting():
+    global _active
+    _active -= 1
+    if _active == 0:
+        cq.Shape._bool_op = _originals.pop("shape")
+        booleans._bool_op = _originals.pop("booleans")
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def current_rss_mb():
+    '''
+    Resident set size from /proc where there is one, otherwise the peak so far.
+    None when neither is available.
+    '''
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # bytes on macOS, kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def count_topology(values):
+    '''
+    None when none of the values hold shapes.
+    '''
+    counts = None
+
+    for value in values:
+        if isinstance(value, cq.Workplane):
+            shapes = [shape for shape in value.vals() if isinstance(shape, cq.Shape)]
+        elif isinstance(value, cq.Shape):
+            shapes = [value]
+        else:
+            continue
+
+        if counts is None:
+            counts = {"solids":0, "faces":0, "edges":0}
+
+        for shape in shapes:
+            counts["solids"] += len(shape.Solids())
+            counts["faces"] += len(shape.Faces())
+            counts["edges"] += len(shape.Edges())
+
+    return counts
+
+class Instrument:
+    def __init__(self, callback=None, count_topology=True):
+        # called with each record as it finishes
+        self.callback = callback
+
+        # face and edge counts walk the result, turn off for huge scenes
+        self.count_topology = count_topology
+
+        self.records = []
+        self.depth = 0
+
+    def measure(self, owner, kind, name, call, outputs=None):
+        '''
+        Run call and record its time, boolean count, resident memory and the topology of
+        the named outputs on owner, or of the return value when outputs is None.
+        Nested measurements are inclusive of their children.
+        '''
+        _start_counting()
+        booleans_before = _boolean_count
+        rss_before = current_rss_mb()
+        self.depth += 1
+        start = time.perf_counter()
+
+        try:
+            result = call()
+        finally:
+            seconds = time.perf_counter() - start
+            self.depth -= 1
+            boolean_ops = _boolean_count - booleans_before
+            _stop_counting()
+
+        record = {
+            "owner":type(owner).__name__,
+            "kind":kind,
+            "name":name,
+            "depth":self.depth,
+            "seconds":seconds,
+            "booleans":boolean_ops
+        }
+
+        rss = current_rss_mb()
+        if rss is not None:
+            record["rss_mb"] = rss
+            record["rss_delta_mb"] = rss - rss_before
+
+        if outputs is None:
+            values = [result]
+        else:
+            values = [getattr(owner, output, None) for output in outputs]
+
+        self.add(record, values)
+        return result
+
+    def add(self, record, values=None):
+        '''
+        Keep a finished record, such as one measured in a worker process,
+        counting the topology of values here.
+        '''
+        if self.count_topology and values is not None:
+            counts = count_topology(values)
+            if counts:
+                record.update(counts)
+
+        self.records.append(record)
+
+        if self.callback:
+            self.callback(record)
+
+    @contextmanager
+    def watch(self, owner):
+        '''
+        with Instrument().watch(bp) as report:
+            bp.make()
+            bp.build()
+        report.save("report.json")
+        '''
+        previous = owner.instrument
+        owner.instrument = self
+        try:
+            yield self
+        finally:
+            owner.instrument = previous
+
+    def to_dict(self):
+        return {"records":self.records}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def save(self, path):
+        with open(path, "w") as report_file:
+            report_file.write(self.to_json())
+
+def instrumented(method):
+    '''
+    Decorator for make and build methods, measured when the object has an instrument.
+    '''
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrument = getattr(self, "instrument", None)
+
+        if instrument is None:
+            return method(self, *args, **kwargs)
+
+        return instrument.measure(self, "build" if method.__name__.startswith("build") else "make", method.__name__, lambda: method(self, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,104 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from collections import OrderedDict
+from .StageCache import key_value
+from .brep import workplane_size
+
+class PrototypeCache:
+    '''
+    In memory sub-component shapes shared by every object in the process,
+    keyed on the component name and the params it was built from.
+    Callers must not edit a returned workplane in place.
+    '''
+    def __init__(self, max_size=256 * 1024 * 1024):
+        # approximate, counted as the binary BREP size of each entry, the unit memory_report uses
+        self.max_size = max_size
+
+        self.entries = OrderedDict()
+        self.total_size = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name, params):
+        values, ok = key_value(list(params))
+        if not ok:
+            return None
+
+        return json.dumps([name, values])
+
+    def get(self, name, params, make):
+        '''
+        The shape built by make() for these params, make only runs on a miss.
+        '''
+        key = self.key(name, params)
+        if key is None:
+            return make()
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+
+        self.misses += 1
+        shape = make()
+        self.store(key, shape)
+        return shape
+
+    def store(self, key, shape):
+        if key in self.entries:
+            self.total_size -= self.entries.pop(key)[1]
+
+        size = workplane_size(shape)
+        if size > self.max_size:
+            return
+
+        self.entries[key] = (shape, size)
+        self.total_size += size
+        self.evict()
+
+    def evict(self):
+        # least recently used first
+        while self.total_size > self.max_size and len(self.entries) > 0:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.total_size -= size
+
+    def clear(self):
+        self.entries.clear()
+        self.total_size = 0
+
+default_cache = PrototypeCache()
+
+def set_default_cache(cache):
+    '''
+    None turns prototype sharing off for objects without their own cache.
+    '''
+    global default_cache
+    default_cache = cache
+
+def prototype(owner, name, params, make):
+    '''
+    make() through the owner's prototype_cache, or the process default.
+    '''
+    cache = getattr(owner, "prototype_cache", None)
+
+    if cache is None:
+        cache = default_cache
+
+    if cache is None:
+        return make()
+
+    return cache.get(name, params, make)
@@ -14,7 +14,7 @@
 
 import cadquery as cq
 from cadqueryhelper import series
-from math import floor
+from .SlotLayout import SlotLayout
 
 class SeriesHelper:
     def __init__(self):
@@ -36,6 +36,12 @@ class SeriesHelper:
         self.skip_list = []
         self.keep_list = []
 
+        # place located references to one prototype instead of copying it per slot
+        self.instance = False
+
+        # optional SlotLayout shared between series, built from the sizes above when not set
+        self.layout = None
+
         self.scene = None
 
     def __validate(self):
@@ -54,21 +60,67 @@ class SeriesHelper:
 
         return self.scene
 
+    def __layout(self):
+        if self.layout is not None:
+            return self.layout
+
+        return SlotLayout(
+            self.outer_length,
+            self.outer_width,
+            self.comp_length,
+            self.comp_padding
+        )
+
+    def __slot_locations(self):
+        '''
+        Location of every kept slot in scene order.
+        '''
+        # matches the spacing used by cadqueryhelper series
+        pitch = self.shape.val().BoundingBox().xlen + self.length_offset
+
+        return self.__layout().locations(
+            pitch,
+            self.x_translate,
+            self.y_translate,
+            self.z_translate,
+            skip_list = self.skip_list,
+            keep_list = self.keep_list
+        )
+
+    def __place(self, solids, location):
+        if self.instance:
+            return [solid.moved(location) for solid in solids]
+
+        # a transformed copy, the same as the series and rotate calls make
+        matrix = cq.Matrix(location.wrapped.Transformation())
+        return [solid.transformShape(matrix) for solid in solids]
+
     def make(self):
         self.__validate()
 
+        if self.layout is not None or self.instance or self.skip_list or self.keep_list:
+            # only the kept slots are built, every solid of the shape goes in its slot.
+            # kept as separate objects rather than one compound,
+            # neighbouring walls overlap at the corners and booleans
+            # don't accept a self intersecting compound as a tool
+            solids = self.shape.solids().vals()
+            placed = []
+
+            for location in self.__slot_locations():
+                placed.extend(self.__place(solids, location))
+
+            self.scene = cq.Workplane("XY").add(placed)
+            return
+
         shape = self.shape
-        length = self.outer_length
-        width = self.outer_width
-        length2 = self.comp_length
         length_offset = self.length_offset
-        padding = self.comp_padding
         x_trans = self.x_translate
         y_trans = self.y_translate
         z_trans = self.z_translate
 
-        x_comp_size = floor(length / (length2 + padding))
-        y_comp_size = floor(width / (length2 + padding))
+        layout = self.__layout()
+        x_comp_size = layout.x_count
+        y_comp_size = layout.y_count
 
         x_shapes = series(
             shape,
@@ -106,19 +158,4 @@ class SeriesHelper:
             .add(x_minus)
             .add(y_minus))
 
-        if self.skip_list and len(self.skip_list) > 0:
-            solids = scene.solids().vals()
-            scene = cq.Workplane("XY")
-
-            for  index, solid in enumerate(solids):
-                if index not in self.skip_list:
-                    scene.add(solid)
-        elif self.keep_list and len(self.keep_list) > 0:
-            solids = scene.solids().vals()
-            scene = cq.Workplane("XY")
-
-            for  index, solid in enumerate(solids):
-                if index in self.keep_list:
-                    scene.add(solid)
-
         self.scene = scene
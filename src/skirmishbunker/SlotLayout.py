@@ -0,0 +1,125 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from math import floor, radians, sin, cos
+
+# wall each slot sits on, in the order SeriesHelper adds the walls
+SIDES = ("+y", "+x", "-y", "-x")
+SIDE_ANGLES = (0, 90, 180, 270)
+
+class SlotLayout:
+    '''
+    Every panel slot around the interior walls as plain lists,
+    list positions are the slot indices skip_list and keep_list refer to.
+    '''
+    def __init__(self, outer_length, outer_width, comp_length, comp_padding):
+        self.outer_length = outer_length
+        self.outer_width = outer_width
+        self.comp_length = comp_length
+        self.comp_padding = comp_padding
+
+        self.x_count = floor(outer_length / (comp_length + comp_padding))
+        self.y_count = floor(outer_width / (comp_length + comp_padding))
+
+        # spacing used by the panel series
+        self.pitch = comp_length + comp_padding * 2
+
+        self.index = []
+        self.side = []
+        self.angle = []
+
+        # position along the wall in pitches, centred on the wall middle
+        self.step = []
+
+        # slot centre on the interior wall line at the panel pitch
+        self.x = []
+        self.y = []
+
+        counts = [self.x_count, self.y_count, self.x_count, self.y_count]
+        for side, angle, count in zip(SIDES, SIDE_ANGLES, counts):
+            for i in range(count):
+                self.index.append(len(self.index))
+                self.side.append(side)
+                self.angle.append(angle)
+                self.step.append(i - (count - 1) / 2)
+
+        for index in self.index:
+            x, y = self.centre(index, self.pitch, outer_length / 2, outer_width / 2)
+            self.x.append(x)
+            self.y.append(y)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __wall_translate(self, side, x_translate, y_translate):
+        return {
+            "+y":(0, y_translate),
+            "+x":(x_translate, 0),
+            "-y":(0, -1 * y_translate),
+            "-x":(-1 * x_translate, 0)
+        }[side]
+
+    def slots(self, skip_list=None, keep_list=None):
+        '''
+        Slot indices left after skip_list or keep_list, skip_list wins when both are set.
+        '''
+        if skip_list and len(skip_list) > 0:
+            return [index for index in self.index if index not in skip_list]
+        elif keep_list and len(keep_list) > 0:
+            return [index for index in self.index if index in keep_list]
+
+        return list(self.index)
+
+    def centre(self, index, pitch, x_translate=0, y_translate=0):
+        '''
+        x, y of a slot without building a location.
+        '''
+        x, y = self.__wall_translate(self.side[index], x_translate, y_translate)
+        offset = self.step[index] * pitch
+        angle = radians(self.angle[index])
+
+        # the walls are turned clockwise about z
+        return x + offset * cos(angle), y - offset * sin(angle)
+
+    def location(self, index, pitch, x_translate=0, y_translate=0, z_translate=0):
+        '''
+        Location of a slot for a series with its own pitch and wall translation.
+        '''
+        side = self.side[index]
+        x, y = self.__wall_translate(side, x_translate, y_translate)
+
+        # the same as rotating about an axis running from (0,0,1) to the origin
+        wall_location = (
+            cq.Location(cq.Vector(x, y, z_translate))
+            * cq.Location(cq.Vector(0, 0, 0), cq.Vector(0, 0, -1), self.angle[index])
+        )
+
+        return wall_location * cq.Location(cq.Vector(self.step[index] * pitch, 0, 0))
+
+    def locations(self, pitch, x_translate=0, y_translate=0, z_translate=0, skip_list=None, keep_list=None):
+        return [
+            self.location(index, pitch, x_translate, y_translate, z_translate)
+            for index in self.slots(skip_list, keep_list)
+        ]
+
+    def to_dict(self):
+        return {
+            "index":list(self.index),
+            "side":list(self.side),
+            "angle":list(self.angle),
+            "step":list(self.step),
+            "x":list(self.x),
+            "y":list(self.y)
+        }
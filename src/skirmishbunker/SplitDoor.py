@@ -16,6 +16,9 @@ import cadquery as cq
 from cadqueryhelper import Base, shape, wave
 
 class SplitDoor(Base):
+    # attributes make fills with shapes, left out of params.blueprint_params
+    shape_fields = ("cut_door", "split_door")
+
     def __init__(self):
         super().__init__()
         self.length = 25
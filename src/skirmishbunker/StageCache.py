@@ -0,0 +1,304 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import dataclasses
+import hashlib
+import inspect
+import json
+import marshal
+import os
+import pickle
+import shutil
+import tempfile
+from .brep import workplane_to_bin, bin_to_workplane
+from .params import hook_value
+
+try:
+    from importlib.metadata import version as package_version
+except ImportError:
+    package_version = None
+
+MANIFEST = "manifest.json"
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "skirmishbunker")
+
+def _package_version(name):
+    if package_version is None:
+        return "unknown"
+
+    try:
+        return package_version(name)
+    except Exception:
+        return "unknown"
+
+_fingerprint = None
+
+def library_fingerprint():
+    '''
+    Versions of everything that shapes a stage result, plus a digest of
+    this package's source so a development checkout invalidates on edit.
+    '''
+    global _fingerprint
+
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+
+        for name in ("skirmishbunker", "cadquery", "cadqueryhelper", "cqterrain"):
+            digest.update(f"{name}={_package_version(name)};".encode())
+
+        source_dir = os.path.dirname(os.path.abspath(__file__))
+        for file_name in sorted(os.listdir(source_dir)):
+            if file_name.endswith(".py"):
+                with open(os.path.join(source_dir, file_name), "rb") as source:
+                    digest.update(source.read())
+
+        _fingerprint = digest.hexdigest()
+
+    return _fingerprint
+
+_source_digests = {}
+
+def _file_digest(path):
+    stat = os.stat(path)
+    stamp = (path, stat.st_mtime_ns, stat.st_size)
+
+    if stamp not in _source_digests:
+        with open(path, "rb") as source:
+            _source_digests[stamp] = hashlib.sha256(source.read()).hexdigest()
+
+    return _source_digests[stamp]
+
+def hook_digest(hook):
+    '''
+    Digest of the source file a custom hook is defined in, so editing the hook,
+    or a constant or helper in the same file, invalidates its entries.
+    Falls back to the compiled code and defaults, None when there's neither.
+    '''
+    try:
+        path = inspect.getsourcefile(hook)
+    except TypeError:
+        path = None
+
+    if path and os.path.isfile(path):
+        return _file_digest(path)
+
+    code = getattr(hook, "__code__", None)
+    if code is None:
+        return None
+
+    defaults, ok = key_value(list(getattr(hook, "__defaults__", None) or ()))
+    if not ok:
+        return None
+
+    digest = hashlib.sha256(marshal.dumps(code))
+    digest.update(json.dumps(defaults).encode())
+    return digest.hexdigest()
+
+def key_value(value):
+    '''
+    Convert a parameter into something json can hash.
+    The second item is False when the value can't be keyed.
+    '''
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value, True
+
+    if isinstance(value, (list, tuple)):
+        values = []
+        for item in value:
+            item_value, ok = key_value(item)
+            if not ok:
+                return None, False
+            values.append(item_value)
+        return values, True
+
+    if callable(value):
+        # custom hooks are keyed by their declared key or name, anonymous functions can't be told apart.
+        # the digest of their source catches edits, values a closure captures or code in
+        # other files it calls are not seen, bump a declared hook_key when those change
+        name = hook_value(value)
+        if name is None:
+            return None, False
+
+        digest = hook_digest(value)
+        if digest is None and getattr(value, "param_key", None) is None:
+            # no source or code to hash, only a declared key is trusted
+            return None, False
+
+        return [name, digest], True
+
+    return None, False
+
+class StageCache:
+    def __init__(self, path=None, max_size=512 * 1024 * 1024):
+        if path is None:
+            path = DEFAULT_PATH
+
+        self.path = path
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, owner, name, params, policy=None):
+        '''
+        Digest of the stage's params, plus the BooleanPolicy its booleans run under when given.
+        None when a param can't be keyed.
+        '''
+        values = {}
+        for param in params:
+            value, ok = key_value(getattr(owner, param, None))
+            if not ok:
+                return None
+            values[param] = value
+
+        payload = json.dumps({
+            "library":library_fingerprint(),
+            "owner":type(owner).__name__,
+            "stage":name,
+            "params":values,
+            "policy":None if policy is None else dataclasses.asdict(policy)
+        }, sort_keys=True)
+
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def __entry_path(self, key):
+        return os.path.join(self.path, key)
+
+    def contains(self, key):
+        return os.path.exists(os.path.join(self.__entry_path(key), MANIFEST))
+
+    def load(self, key):
+        entry = self.__entry_path(key)
+        manifest_path = os.path.join(entry, MANIFEST)
+
+        if not os.path.exists(manifest_path):
+            self.misses += 1
+            return None
+
+        try:
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+
+            outputs = {}
+            for name, output in manifest.items():
+                if output["type"] == "shape":
+                    with open(os.path.join(entry, output["file"]), "rb") as shape_file:
+                        outputs[name] = bin_to_workplane(shape_file.read())
+                elif output["type"] == "pickle":
+                    with open(os.path.join(entry, output["file"]), "rb") as pickle_file:
+                        outputs[name] = pickle.loads(pickle_file.read())
+                else:
+                    outputs[name] = output["value"]
+        except Exception:
+            # a damaged entry is treated as a miss and rebuilt
+            shutil.rmtree(entry, ignore_errors=True)
+            self.misses += 1
+            return None
+
+        # mark as recently used for eviction
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return outputs
+
+    def store(self, key, outputs):
+        manifest = {}
+        files = {}
+
+        for name, value in outputs.items():
+            if isinstance(value, cq.Workplane):
+                file_name = f"{name}.bin"
+                manifest[name] = {"type":"shape", "file":file_name}
+                files[file_name] = workplane_to_bin(value)
+            elif value is None or isinstance(value, (bool, int, float, str)):
+                manifest[name] = {"type":"value", "value":value}
+            else:
+                # made objects such as a roof pickle with their workplanes as BREP
+                try:
+                    data = pickle.dumps(value)
+                except Exception:
+                    # not something we know how to persist
+                    return False
+
+                file_name = f"{name}.pickle"
+                manifest[name] = {"type":"pickle", "file":file_name}
+                files[file_name] = data
+
+        os.makedirs(self.path, exist_ok=True)
+
+        # write to a temp directory and rename so concurrent
+        # readers never see a half written entry
+        temp_entry = tempfile.mkdtemp(dir=self.path, prefix=".tmp-")
+        try:
+            for file_name, data in files.items():
+                with open(os.path.join(temp_entry, file_name), "wb") as data_file:
+                    data_file.write(data)
+
+            with open(os.path.join(temp_entry, MANIFEST), "w") as manifest_file:
+                json.dump(manifest, manifest_file)
+
+            os.rename(temp_entry, self.__entry_path(key))
+        except OSError:
+            # another process stored the same key first
+            shutil.rmtree(temp_entry, ignore_errors=True)
+            return False
+
+        self.evict()
+        return True
+
+    def __entries(self):
+        entries = []
+
+        if not os.path.isdir(self.path):
+            return entries
+
+        for name in os.listdir(self.path):
+            entry = self.__entry_path(name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+
+            try:
+                size = 0
+                for file_name in os.listdir(entry):
+                    size += os.path.getsize(os.path.join(entry, file_name))
+
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                # evicted by another process while we were looking
+                continue
+
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.__entries())
+
+    def evict(self):
+        entries = self.__entries()
+        total = sum(size for _, size, _ in entries)
+
+        # least recently used first
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, _, entry in self.__entries():
+            shutil.rmtree(entry, ignore_errors=True)
@@ -5,4 +5,10 @@ from .DetailedRoof import DetailedRoof
 from .Hatch import Hatch
 from .Catwalk import Catwalk
 from .FlatRoof import FlatRoof
-from .SeriesHelper import SeriesHelper
\ No newline at end of file
+from .SeriesHelper import SeriesHelper
+from .SlotLayout import SlotLayout
+from .StageCache import StageCache
+from .PrototypeCache import PrototypeCache
+from .booleans import BooleanPolicy
+from .Instrument import Instrument
+from .params import ParamSnapshot, blueprint_params, hook_key
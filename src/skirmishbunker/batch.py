@@ -0,0 +1,413 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Build many blueprint configurations across a process pool.
+
+A job is a dict:
+    {
+        "name": "bunker_med",
+        "type": "Bunker",
+        "params": {"width": 140, "length": 110},
+        "method": "build",
+        "output": "stl/bunker_med.stl"
+    }
+
+Only "type" is required. Callables such as custom_floor_tile are given
+as {"callable": "module:function"}. Jobs building the same blueprint params
+with the same method and output format are built once and the output copied.
+
+A config file is a JSON list of jobs, or a JSON or TOML table with a jobs list
+and optional output_dir, cache and workers settings, see example/catalog.toml.
+The StageCache is opt in, cache is a folder, true for the default folder,
+or false / null for none.
+
+skirmishbunker catalog.toml --jobs 8 --output-dir stl
+python -m skirmishbunker.batch jobs.json --workers 8 --output-dir stl
+'''
+
+import argparse
+import cadquery as cq
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from .Bunker import Bunker
+from .BlastDoor import BlastDoor
+from .SplitDoor import SplitDoor
+from .DetailedRoof import DetailedRoof
+from .Hatch import Hatch
+from .Catwalk import Catwalk
+from .FlatRoof import FlatRoof
+from .StageCache import StageCache, DEFAULT_PATH
+from .params import blueprint_params
+
+TYPES = {
+    "Bunker":Bunker,
+    "BlastDoor":BlastDoor,
+    "SplitDoor":SplitDoor,
+    "DetailedRoof":DetailedRoof,
+    "Hatch":Hatch,
+    "Catwalk":Catwalk,
+    "FlatRoof":FlatRoof
+}
+
+def resolve_value(value):
+    if isinstance(value, dict) and "callable" in value:
+        module_name, _, attr = value["callable"].partition(":")
+        return getattr(importlib.import_module(module_name), attr)
+
+    return value
+
+def make_blueprint(job):
+    type_name = job.get("type")
+    if type_name not in TYPES:
+        raise Exception(f"Unknown blueprint type {type_name}")
+
+    bp = TYPES[type_name]()
+
+    for name, value in job.get("params", {}).items():
+        if not hasattr(bp, name):
+            raise Exception(f"{type_name} has no parameter {name}")
+        setattr(bp, name, resolve_value(value))
+
+    return bp
+
+def job_name(job, index):
+    return job.get("name", f"{job.get('type', 'job')}_{index}")
+
+def run_job(job, index=0, output_dir=None, cache=None):
+    '''
+    Make, build and export a single job.
+    Never raises, failures are reported in the result.
+    '''
+    result = {
+        "name":job_name(job, index),
+        "index":index,
+        "ok":False,
+        "error":None,
+        "output":None,
+        "make_seconds":None,
+        "build_seconds":None,
+        "export_seconds":None,
+        "seconds":None
+    }
+
+    start = time.perf_counter()
+    try:
+        bp = make_blueprint(job)
+
+        if cache:
+            bp.stage_cache = StageCache(cache)
+
+        step = time.perf_counter()
+        bp.make()
+        result["make_seconds"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        scene = getattr(bp, job.get("method", "build"))()
+        result["build_seconds"] = time.perf_counter() - step
+
+        output = job.get("output")
+        if output:
+            if output_dir:
+                output = os.path.join(output_dir, output)
+
+            folder = os.path.dirname(output)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+            step = time.perf_counter()
+            cq.exporters.export(scene, output)
+            result["export_seconds"] = time.perf_counter() - step
+            result["output"] = output
+
+        result["ok"] = True
+    except Exception as err:
+        result["error"] = f"{type(err).__name__}: {err}"
+        result["traceback"] = traceback.format_exc()
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def crashed_result(job, index):
+    return {
+        "name":job_name(job, index),
+        "index":index,
+        "ok":False,
+        "error":"worker process died",
+        "output":None,
+        "make_seconds":None,
+        "build_seconds":None,
+        "export_seconds":None,
+        "seconds":None
+    }
+
+def job_key(job):
+    '''
+    What a job builds, its blueprint params, method and output format.
+    None when the job can't be configured, run_job reports why.
+    '''
+    try:
+        bp = make_blueprint(job)
+    except Exception:
+        return None
+
+    output = job.get("output")
+    extension = os.path.splitext(output)[1].lower() if output else None
+    return (blueprint_params(bp), job.get("method", "build"), extension)
+
+def find_duplicates(jobs):
+    '''
+    {index: index of the first job building the same thing} for each repeated job.
+    '''
+    first = {}
+    duplicates = {}
+
+    for index, job in enumerate(jobs):
+        key = job_key(job)
+        if key is None:
+            continue
+
+        if key in first:
+            duplicates[index] = first[key]
+        else:
+            first[key] = index
+
+    return duplicates
+
+def duplicate_result(job, index, original, output_dir=None):
+    '''
+    Result of a job that builds the same thing as original, with the original's output copied.
+    '''
+    result = {
+        "name":job_name(job, index),
+        "index":index,
+        "ok":original["ok"],
+        "error":original["error"],
+        "output":None,
+        "make_seconds":None,
+        "build_seconds":None,
+        "export_seconds":None,
+        "seconds":None,
+        "duplicate_of":original["name"]
+    }
+
+    start = time.perf_counter()
+    output = job.get("output")
+    if original["ok"] and output and original["output"]:
+        if output_dir:
+            output = os.path.join(output_dir, output)
+
+        folder = os.path.dirname(output)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        try:
+            if os.path.abspath(output) != os.path.abspath(original["output"]):
+                shutil.copyfile(original["output"], output)
+            result["output"] = output
+        except OSError as err:
+            result["ok"] = False
+            result["error"] = f"{type(err).__name__}: {err}"
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def run_batch(jobs, workers=None, output_dir=None, cache=None, on_result=None, dedupe=True):
+    '''
+    Run every job and return the results in job order.
+    workers=1 runs in this process. With dedupe repeated jobs are built once.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    results = [None] * len(jobs)
+    duplicates = find_duplicates(jobs) if dedupe else {}
+    pending = [index for index in range(len(jobs)) if index not in duplicates]
+
+    def finish(index, result):
+        results[index] = result
+        if on_result:
+            on_result(result)
+
+    def finish_duplicates():
+        for index, original in sorted(duplicates.items()):
+            finish(index, duplicate_result(jobs[index], index, results[original], output_dir))
+
+    if workers <= 1 or not pending:
+        for index in pending:
+            finish(index, run_job(jobs[index], index, output_dir, cache))
+        finish_duplicates()
+        return results
+
+    # spawn so workers don't inherit OCC thread state from a fork
+    context = multiprocessing.get_context("spawn")
+    crashed = []
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context) as pool:
+        futures = {pool.submit(run_job, jobs[index], index, output_dir, cache):index for index in pending}
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                finish(index, future.result())
+            except BrokenProcessPool:
+                crashed.append(index)
+
+    # a dead worker takes the whole pool down and the pool can't say which
+    # job did it, so rerun each casualty in its own process
+    for index in sorted(crashed):
+        finish(index, run_isolated(jobs[index], index, output_dir, cache))
+
+    finish_duplicates()
+    return results
+
+def run_isolated(job, index, output_dir=None, cache=None):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        try:
+            return pool.submit(run_job, job, index, output_dir, cache).result()
+        except BrokenProcessPool:
+            return crashed_result(job, index)
+
+def summarize(results, wall_seconds=None):
+    failed = [result for result in results if not result["ok"]]
+    job_seconds = sum(result["seconds"] or 0 for result in results)
+
+    summary = {
+        "jobs":len(results),
+        "succeeded":len(results) - len(failed),
+        "failed":len(failed),
+        "job_seconds":job_seconds,
+        "wall_seconds":wall_seconds,
+        "failures":[{"name":result["name"], "error":result["error"]} for result in failed]
+    }
+
+    return summary
+
+# config file settings the command line can override
+SETTINGS = ("output_dir", "cache", "workers")
+
+def read_config(path):
+    if os.path.splitext(path)[1].lower() == ".toml":
+        if tomllib is None:
+            raise Exception("Reading TOML configs needs Python 3.11 or the tomli package")
+
+        with open(path, "rb") as config_file:
+            return tomllib.load(config_file)
+
+    with open(path) as config_file:
+        return json.load(config_file)
+
+def load_config(path):
+    '''
+    Jobs and settings from a JSON or TOML config file.
+    A relative output_dir or cache is taken from the config file's folder.
+    '''
+    data = read_config(path)
+
+    if not isinstance(data, dict):
+        return data, {}
+
+    unknown = set(data) - set(SETTINGS) - {"jobs"}
+    if unknown:
+        raise Exception(f"Unknown config settings {sorted(unknown)}, expected jobs or one of {SETTINGS}")
+
+    settings = {name: data[name] for name in SETTINGS if name in data}
+    folder = os.path.dirname(os.path.abspath(path))
+
+    for name in ("output_dir", "cache"):
+        if isinstance(settings.get(name), str):
+            settings[name] = os.path.join(folder, os.path.expanduser(settings[name]))
+
+    return data.get("jobs", []), settings
+
+def load_jobs(path):
+    return load_config(path)[0]
+
+def format_result(result):
+    status = "ok" if result["ok"] else "FAILED"
+    seconds = result["seconds"] or 0
+    line = f"{status:<7}{seconds:>9.2f}s  {result['name']}"
+
+    if result.get("duplicate_of"):
+        line += f"  (same as {result['duplicate_of']})"
+
+    if result["error"]:
+        line += f"  {result['error']}"
+
+    return line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="skirmishbunker", description="Build many blueprint configurations in parallel.")
+    parser.add_argument("config", help="json or toml config file with a list of jobs")
+    parser.add_argument("-j", "--jobs", "--workers", dest="workers", type=int, default=None, help="worker processes, defaults to the cpu count")
+    parser.add_argument("--output-dir", default=None, help="folder job outputs are written relative to")
+    parser.add_argument("--cache", default=None, help="StageCache folder shared by the workers")
+    parser.add_argument("--default-cache", action="store_true", help=f"use the StageCache in {DEFAULT_PATH}")
+    parser.add_argument("--no-cache", action="store_true", help="make every stage, even when the config sets a cache")
+    parser.add_argument("--report", default=None, help="write the results and summary as json")
+    parser.add_argument("--no-dedupe", action="store_true", help="build repeated jobs again instead of copying the first one's output")
+    args = parser.parse_args(argv)
+
+    jobs, settings = load_config(args.config)
+
+    workers = args.workers if args.workers is not None else settings.get("workers")
+    output_dir = args.output_dir if args.output_dir is not None else settings.get("output_dir")
+    cache = None
+    if args.no_cache:
+        cache = None
+    elif args.cache is not None:
+        cache = args.cache
+    elif args.default_cache:
+        cache = DEFAULT_PATH
+    elif settings.get("cache") is True:
+        cache = DEFAULT_PATH
+    elif settings.get("cache"):
+        cache = settings["cache"]
+
+    start = time.perf_counter()
+    results = run_batch(
+        jobs, workers, output_dir, cache,
+        on_result=lambda result: print(format_result(result), flush=True),
+        dedupe=not args.no_dedupe
+    )
+    summary = summarize(results, time.perf_counter() - start)
+
+    print(f"{summary['succeeded']}/{summary['jobs']} jobs succeeded in {summary['wall_seconds']:.2f}s ({summary['job_seconds']:.2f}s of job time)")
+
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump({"summary":summary, "results":results}, report_file, indent=2)
+
+    return 0 if summary["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from dataclasses import dataclass
+from OCP.BRepAlgoAPI import BRepAlgoAPI_Cut, BRepAlgoAPI_Fuse
+from OCP.TopTools import TopTools_ListOfShape
+from .brep import workplane_shapes
+
+REDUCTIONS = ("multi", "tree")
+
+# frozen so memoized builds and cache keys can compare policies by value,
+# use dataclasses.replace(policy, fuzzy=1e-5) for a variation
+@dataclass(frozen=True)
+class BooleanPolicy:
+    # let OCC split a boolean across its thread pool
+    parallel: bool = True
+
+    # fuzzy tolerance, treats near coincident faces as touching
+    fuzzy: float = None
+
+    # oriented bounding boxes prefilter rotated shapes more tightly
+    use_obb: bool = False
+
+    # how union_all fuses a list of solids
+    # multi - one boolean with every solid as an argument
+    # tree - pairwise in a balanced tree, every boolean sees two similar sized operands
+    reduction: str = "multi"
+
+default_policy = BooleanPolicy()
+
+def set_default_policy(policy):
+    global default_policy
+    default_policy = policy
+
+def resolve_policy(owner):
+    policy = getattr(owner, "boolean_policy", None)
+
+    if policy is None:
+        return default_policy
+
+    return policy
+
+def collect_shapes(items):
+    '''
+    Break workplanes and compounds down to their solids, a compound whose
+    members overlap is not a valid boolean argument.
+    '''
+    shapes = []
+
+    for item in items:
+        if item is None:
+            continue
+
+        if isinstance(item, cq.Workplane):
+            candidates = workplane_shapes(item)
+        else:
+            candidates = [item]
+
+        for shape in candidates:
+            solids = shape.Solids()
+            if len(solids) > 0:
+                shapes.extend(solids)
+            else:
+                shapes.append(shape)
+
+    return shapes
+
+def _to_list(shapes):
+    shape_list = TopTools_ListOfShape()
+    for shape in shapes:
+        shape_list.Append(shape.wrapped)
+    return shape_list
+
+def _bool_op(operation, arguments, tools, policy=None):
+    if policy is None:
+        policy = default_policy
+
+    operation.SetArguments(_to_list(arguments))
+    operation.SetTools(_to_list(tools))
+    operation.SetRunParallel(policy.parallel)
+    operation.SetUseOBB(policy.use_obb)
+
+    if policy.fuzzy:
+        operation.SetFuzzyValue(policy.fuzzy)
+
+    operation.Build()
+
+    if not operation.IsDone():
+        raise Exception("Boolean operation failed")
+
+    return cq.Shape.cast(operation.Shape()).clean()
+
+def cut_shapes(arguments, tools, policy=None):
+    '''
+    Subtract every tool from every argument in a single OCC boolean.
+    Arguments and tools may be workplanes, shapes or None.
+    '''
+    arguments = collect_shapes(arguments)
+    tools = collect_shapes(tools)
+
+    if len(tools) == 0:
+        if len(arguments) == 1:
+            return arguments[0]
+        return cq.Compound.makeCompound(arguments)
+
+    return _bool_op(BRepAlgoAPI_Cut(), arguments, tools, policy)
+
+def fuse_shapes(arguments, tools=(), policy=None):
+    '''
+    Fuse every argument and tool in a single OCC boolean.
+    '''
+    shapes = collect_shapes(arguments) + collect_shapes(tools)
+
+    if len(shapes) == 1:
+        return shapes[0]
+
+    return _bool_op(BRepAlgoAPI_Fuse(), shapes[:1], shapes[1:], policy)
+
+def trim_shapes(items, tools, policy=None):
+    '''
+    Solids of items with tools cut from the ones whose bounding boxes they touch.
+    Untouched solids come back as they are, so located copies stay shared.
+    '''
+    shapes = collect_shapes(items)
+    tools = collect_shapes(tools)
+    tool_boxes = [tool.BoundingBox().wrapped for tool in tools]
+
+    trimmed = []
+    for shape in shapes:
+        box = shape.BoundingBox().wrapped
+        touching = [tool for tool, tool_box in zip(tools, tool_boxes) if not box.IsOut(tool_box)]
+
+        if len(touching) > 0:
+            trimmed.append(_bool_op(BRepAlgoAPI_Cut(), [shape], touching, policy))
+        else:
+            trimmed.append(shape)
+
+    return trimmed
+
+def fuse_tree(items, policy=None):
+    '''
+    Fuse pairs, then pairs of the results, until one shape is left.
+    '''
+    shapes = collect_shapes(items)
+
+    if len(shapes) == 0:
+        return None
+
+    while len(shapes) > 1:
+        fused = [
+            _bool_op(BRepAlgoAPI_Fuse(), [shapes[i]], [shapes[i + 1]], policy)
+            for i in range(0, len(shapes) - 1, 2)
+        ]
+
+        if len(shapes) % 2 == 1:
+            fused.append(shapes[-1])
+
+        shapes = fused
+
+    return shapes[0]
+
+def union_all(items, policy=None):
+    '''
+    Workplane of every item fused together, in place of a chain of .union calls.
+    Items may be workplanes, shapes or None.
+    '''
+    if policy is None:
+        policy = default_policy
+
+    if policy.reduction not in REDUCTIONS:
+        raise Exception(f"Invalid reduction {policy.reduction}")
+
+    shapes = collect_shapes(items)
+
+    if len(shapes) == 0:
+        return cq.Workplane("XY")
+
+    if policy.reduction == "tree":
+        shape = fuse_tree(shapes, policy)
+    else:
+        shape = fuse_shapes(shapes, policy=policy)
+
+    return cq.Workplane("XY").add(shape)
+
+def cut(scene, tool, policy=None):
+    '''
+    Workplane cut that honours a BooleanPolicy.
+    '''
+    return cq.Workplane("XY").add(cut_shapes([scene], [tool], policy))
+
+def union(scene, tool, policy=None):
+    '''
+    Workplane union that honours a BooleanPolicy.
+    '''
+    return cq.Workplane("XY").add(fuse_shapes([scene], [tool], policy))
@@ -0,0 +1,120 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import zlib
+from io import BytesIO
+from OCP.TopoDS import TopoDS_Iterator
+
+# belong to the running process, left at their defaults when a pickled object is loaded
+TRANSIENT_STATE = ("stage_executor", "instrument", "build_memo", "prototype_cache", "_build_depth")
+
+def workplane_shapes(workplane):
+    return [val for val in workplane.vals() if isinstance(val, cq.Shape)]
+
+def workplane_to_brep(workplane):
+    compound = cq.Compound.makeCompound(workplane_shapes(workplane))
+    stream = BytesIO()
+    compound.exportBrep(stream)
+    return stream.getvalue()
+
+def _compound_to_workplane(compound):
+    # unpack the top level of the compound so the workplane
+    # holds the same objects it was saved from
+    shapes = []
+    iterator = TopoDS_Iterator(compound.wrapped)
+    while iterator.More():
+        shapes.append(cq.Shape.cast(iterator.Value()))
+        iterator.Next()
+
+    return cq.Workplane("XY").add(shapes)
+
+def brep_to_workplane(data):
+    return _compound_to_workplane(cq.Shape.importBrep(BytesIO(data)))
+
+def workplane_to_bin(workplane):
+    '''
+    Binary BREP, compressed. Faster to write and a fraction of the size of text BREP.
+    '''
+    compound = cq.Compound.makeCompound(workplane_shapes(workplane))
+    stream = BytesIO()
+    compound.exportBin(stream)
+    return zlib.compress(stream.getvalue(), 1)
+
+def workplane_size(workplane):
+    '''
+    Uncompressed binary BREP bytes, roughly proportional to the memory the shapes take.
+    '''
+    compound = cq.Compound.makeCompound(workplane_shapes(workplane))
+    stream = BytesIO()
+    compound.exportBin(stream)
+    return len(stream.getvalue())
+
+def bin_to_workplane(data):
+    return _compound_to_workplane(cq.Shape.importBin(BytesIO(zlib.decompress(data))))
+
+class PackedWorkplane:
+    '''
+    Picklable stand in for a workplane, only its shapes are kept.
+    '''
+    def __init__(self, workplane):
+        self.data = workplane_to_bin(workplane)
+
+    def unpack(self):
+        return bin_to_workplane(self.data)
+
+def pack_value(value):
+    if isinstance(value, cq.Workplane):
+        return PackedWorkplane(value)
+
+    if isinstance(value, (list, tuple)):
+        return type(value)(pack_value(item) for item in value)
+
+    if isinstance(value, dict):
+        return {key: pack_value(item) for key, item in value.items()}
+
+    return value
+
+def unpack_value(value):
+    if isinstance(value, PackedWorkplane):
+        return value.unpack()
+
+    if isinstance(value, (list, tuple)):
+        return type(value)(unpack_value(item) for item in value)
+
+    if isinstance(value, dict):
+        return {key: unpack_value(item) for key, item in value.items()}
+
+    return value
+
+def shape_state(owner):
+    '''
+    owner's attributes for __getstate__, workplanes packed as binary BREP.
+    Custom hooks have to be module level functions to pickle.
+    '''
+    return {
+        name: pack_value(value)
+        for name, value in owner.__dict__.items()
+        if name not in TRANSIENT_STATE
+    }
+
+def restore_shape_state(owner, state):
+    '''
+    __setstate__ counterpart to shape_state, attributes missing from
+    the state keep the defaults __init__ gives them.
+    '''
+    owner.__init__()
+
+    for name, value in state.items():
+        setattr(owner, name, unpack_value(value))
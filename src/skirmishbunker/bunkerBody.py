@@ -34,6 +34,8 @@ def init_body_params(self):
     self.interior_rectangle = None
     self.base = None
 
+WEDGE_PARAMS = ("length", "width", "height", "inset", "corner_chamfer")
+
 def make_wedge(self):
     self.wedge = (
         cq.Workplane("XY" )
@@ -51,25 +53,30 @@ def make_wedge(self):
     if self.corner_chamfer > 0:
         self.wedge = self.wedge.edges("(not >Z) and (not <Z)").chamfer(self.corner_chamfer)
 
+INTERIOR_PARAMS = ("length", "width", "height", "inset", "wall_width", "floor_thickness")
+
+def calc_interior_size(self):
+    if self.inset < 0:
+        return self.length - (2*(self.wall_width)), self.width - (2*(self.wall_width))
+
+    return self.length - (2*(self.inset+self.wall_width)), self.width - (2*(self.inset+self.wall_width))
+
 def make_interior_rectangle(self):
-    self.int_length = self.length - (2*(self.inset+self.wall_width))
-    self.int_width = self.width - (2*(self.inset+self.wall_width))
+    self.int_length, self.int_width = calc_interior_size(self)
 
     if self.floor_thickness:
         floor_thickness = self.floor_thickness
     else:
         floor_thickness = self.wall_width
 
-    if self.inset < 0:
-        self.int_length = self.length - (2*(self.wall_width))
-        self.int_width = self.width - (2*(self.wall_width))
-
     self.interior_rectangle = (
         cq.Workplane("XY")
         .box(self.int_length, self.int_width, self.height - floor_thickness)
         .translate((0, 0, floor_thickness / 2))
     )
 
+BASE_PARAMS = ("length", "width", "height", "base_height", "corner_chamfer")
+
 def make_base(self):
     self.base = (
         cq.Workplane("XY")
@@ -0,0 +1,161 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from .booleans import cut_shapes, fuse_shapes, trim_shapes, resolve_policy
+from .bunkerFloor import fuse_floor_tiles, build_floor_tiles, interior_clip
+
+# everything build_body and build_body_batched read
+BODY_BUILD_PARAMS = (
+    "batch_booleans", "boolean_policy", "floor_tile_mode",
+    "length", "width", "height", "int_length", "int_width",
+    "render_interior", "render_base", "render_cut_panels", "render_pips", "render_magnets",
+    "render_windows", "render_doors", "render_floor_tiles", "render_floor_cuts",
+    "render_ladders", "render_panel_details",
+    "wedge", "interior_rectangle", "base", "cut_panels", "pips", "cut_pips",
+    "cut_windows", "windows", "cut_doors", "doors", "interior_tiles",
+    "floor_cuts", "ladders", "panels"
+)
+
+def build_body_batched(self):
+    '''
+    Same result as the chained build_body but the body takes one fuse,
+    one cut and one more fuse no matter how many features are turned on.
+    '''
+    policy = resolve_policy(self)
+    stock = [self.wedge]
+    cutters = []
+    additions = []
+
+    if self.render_interior:
+        cutters.append(self.interior_rectangle)
+
+    # the base sits below the interior cut
+    if self.render_base and self.base:
+        stock.append(self.base)
+
+    if self.render_cut_panels and self.cut_panels:
+        cutters.append(self.cut_panels)
+
+    if self.render_pips and self.pips:
+        if self.render_magnets:
+            cutters.append(self.pips)
+        else:
+            stock.append(self.pips)
+        cutters.append(self.cut_pips)
+
+    render_doors = self.render_doors and self.cut_doors and self.doors
+
+    if self.render_windows and self.cut_windows and self.windows:
+        cutters.append(self.cut_windows)
+
+        # the chained build cuts the doors after the windows are added
+        if render_doors:
+            additions.append(cut_shapes([self.windows], [self.cut_doors], policy))
+        else:
+            additions.append(self.windows)
+
+    if render_doors:
+        cutters.append(self.cut_doors)
+        additions.append(self.doors)
+
+    fuse_tiles = fuse_floor_tiles(self)
+    if self.render_floor_tiles and self.interior_tiles and fuse_tiles:
+        additions.append(self.interior_tiles)
+
+    if self.render_floor_cuts and self.floor_cuts:
+        cutters.append(self.floor_cuts)
+
+        # the chained build cuts the floor after the windows, doors and tiles are added
+        if len(additions) > 0:
+            additions = [cut_shapes(additions, [self.floor_cuts], policy)]
+
+    if self.render_ladders and self.ladders:
+        additions.append(self.ladders)
+
+    body = cut_shapes([fuse_shapes(stock, policy=policy)], cutters, policy)
+    body = fuse_shapes([body], additions, policy)
+
+    scene = cq.Workplane("XY").add(body)
+
+    if self.render_panel_details and self.panels:
+        scene = scene.add(self.panels)
+
+    if self.render_floor_tiles and self.interior_tiles and not fuse_tiles:
+        scene = scene.add(build_floor_tiles(self, policy))
+
+    return scene
+
+def build_body_parts(self):
+    '''
+    The body with the windows, doors, floor tiles, ladders and panel details
+    left as their own parts, named after the stage outputs. Each feature is
+    trimmed by the cuts build_body makes after adding it, so together they
+    match build_body while repeated features keep their series placement.
+    '''
+    policy = resolve_policy(self)
+    stock = [self.wedge]
+    cutters = []
+    features = {}
+
+    def trim(name, tools):
+        if name in features:
+            features[name] = trim_shapes([features[name]], tools, policy)
+
+    if self.render_interior:
+        cutters.append(self.interior_rectangle)
+
+    if self.render_base and self.base:
+        stock.append(self.base)
+
+    if self.render_cut_panels and self.cut_panels:
+        cutters.append(self.cut_panels)
+
+    if self.render_pips and self.pips:
+        if self.render_magnets:
+            cutters.append(self.pips)
+        else:
+            stock.append(self.pips)
+        cutters.append(self.cut_pips)
+
+    if self.render_windows and self.cut_windows and self.windows:
+        cutters.append(self.cut_windows)
+        features["windows"] = self.windows
+
+    if self.render_doors and self.cut_doors and self.doors:
+        cutters.append(self.cut_doors)
+        trim("windows", [self.cut_doors])
+        features["doors"] = self.doors
+
+    if self.render_floor_tiles and self.interior_tiles:
+        features["interior_tiles"] = self.interior_tiles
+        trim("interior_tiles", interior_clip(self))
+
+    if self.render_floor_cuts and self.floor_cuts:
+        cutters.append(self.floor_cuts)
+        for name in list(features):
+            trim(name, [self.floor_cuts])
+
+    if self.render_ladders and self.ladders:
+        features["ladders"] = self.ladders
+
+    if self.render_panel_details and self.panels:
+        features["panels"] = self.panels
+
+    parts = {"body":cq.Workplane("XY").add(cut_shapes([fuse_shapes(stock, policy=policy)], cutters, policy))}
+
+    for name, feature in features.items():
+        parts[name] = cq.Workplane("XY").add(feature.vals() if isinstance(feature, cq.Workplane) else feature)
+
+    return parts
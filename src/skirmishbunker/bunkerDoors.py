@@ -14,6 +14,8 @@
 
 import cadquery as cq
 from .BlastDoor import BlastDoor
+from .draft import proxy_box
+from .PrototypeCache import prototype
 
 def init_door_params(self):
     self.render_doors=True
@@ -32,6 +34,12 @@ def init_door_params(self):
     self.cut_doors = None
     self.doors = None
 
+CUT_DOOR_PARAMS = (
+    "height", "inset", "wall_width", "floor_thickness",
+    "door_panels", "door_length", "door_height", "door_fillet",
+    "custom_cut_door", "custom_cut_door_padding"
+)
+
 def make_cut_doors(self):
     height = self.height
     door_cut_width = self.inset+self.wall_width
@@ -67,6 +75,21 @@ def make_cut_doors(self):
         z_translate=0, skip_list=None, keep_list=self.door_panels
     )
 
+def make_blast_door(self):
+    bp = BlastDoor()
+    bp.length = self.door_length
+    bp.width = self.door_width
+    bp.height = self.door_height
+    bp.fillet = self.door_fillet
+    bp.make()
+    return bp.build()
+
+DOOR_PARAMS = (
+    "height", "inset", "wall_width", "floor_thickness",
+    "door_panels", "door_length", "door_width", "door_height", "door_fillet",
+    "custom_door", "custom_door_padding", "draft"
+)
+
 def make_doors(self):
     height = self.height
 
@@ -78,13 +101,17 @@ def make_doors(self):
     if self.custom_door:
         door = self.custom_door(self)
     else:
-        bp = BlastDoor()
-        bp.length = self.door_length
-        bp.width = self.door_width
-        bp.height = self.door_height
-        bp.fillet = self.door_fillet
-        bp.make()
-        door = bp.build().translate((
+        if self.draft:
+            door = proxy_box(self.door_length, self.door_width, self.door_height)
+        else:
+            door = prototype(
+                self,
+                "BlastDoor",
+                (self.door_length, self.door_width, self.door_height, self.door_fillet),
+                lambda: make_blast_door(self)
+            )
+
+        door = door.translate((
             0,
             0,
             -1 * (height / 2 - self.door_height / 2) + floor_thickness
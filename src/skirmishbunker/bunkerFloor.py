@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import cadquery as cq
 from cqterrain import tile
 from cadqueryhelper import grid
 from math import floor as math_floor
+from .booleans import cut_shapes
+from .draft import grid_proxy
 
 def init_floor_params(self):
     self.render_floor_tiles=True
@@ -25,11 +28,26 @@ def init_floor_params(self):
     self.floor_mid_tile_size = 3.2
     self.floor_tile_padding = 1
 
+    # fuse - tiles are unioned into the body
+    # compound - tiles are kept as separate solids resting on the floor, much faster to build
+    self.floor_tile_mode = "fuse"
+
     self.custom_floor_tile = None
 
     self.interior_tiles = None
 
+FLOOR_PARAMS = (
+    "height", "int_length", "int_width", "wall_width", "floor_thickness",
+    "floor_padding", "floor_tile_size", "floor_tile_height", "floor_tile_padding",
+    "floor_chamfer_size", "floor_mid_tile_size", "custom_floor_tile", "draft"
+)
+
+FLOOR_TILE_MODES = ("fuse", "compound")
+
 def make_interior_floor(self):
+    if self.floor_tile_mode not in FLOOR_TILE_MODES:
+        raise Exception(f"Invalid floor_tile_mode {self.floor_tile_mode}")
+
     tile_size = self.floor_tile_size
     tile_padding = self.floor_tile_padding
     int_length = self.int_length-self.floor_padding
@@ -47,7 +65,54 @@ def make_interior_floor(self):
 
     columns = math_floor(int_width/(tile_size + tile_padding))
     rows = math_floor(int_length/(tile_size + tile_padding))
-    tile_grid = grid.make_grid(part=floor_tile, dim = [tile_size + tile_padding, tile_size + tile_padding], columns = columns, rows = rows)
     z_tile_translate = -1 * (self.height / 2 - self.floor_tile_height / 2 - floor_thickness)
 
+    if self.draft:
+        tile_grid = grid_proxy(floor_tile, [tile_size + tile_padding, tile_size + tile_padding], columns, rows)
+
+        if tile_grid is None:
+            self.interior_tiles = None
+            return
+    else:
+        tile_grid = grid.make_grid(part=floor_tile, dim = [tile_size + tile_padding, tile_size + tile_padding], columns = columns, rows = rows)
+
     self.interior_tiles = tile_grid.translate((0,0,z_tile_translate))
+
+def fuse_floor_tiles(self):
+    if self.floor_tile_mode not in FLOOR_TILE_MODES:
+        raise Exception(f"Invalid floor_tile_mode {self.floor_tile_mode}")
+
+    return self.floor_tile_mode == "fuse"
+
+def interior_clip(self):
+    '''
+    Four slabs around the interior rectangle. Cutting them trims tiles that run
+    under the walls, which a fuse would absorb, without a boolean to make the wall region.
+    '''
+    margin = max(self.length, self.width)
+    height = self.height * 2
+
+    x_translate = self.int_length / 2 + margin / 2
+    y_translate = self.int_width / 2 + margin / 2
+
+    side = cq.Workplane("XY").box(margin, self.int_width + margin * 2, height)
+    end = cq.Workplane("XY").box(self.int_length, margin, height)
+
+    return [
+        side.translate((x_translate, 0, 0)),
+        side.translate((-1 * x_translate, 0, 0)),
+        end.translate((0, y_translate, 0)),
+        end.translate((0, -1 * y_translate, 0))
+    ]
+
+def build_floor_tiles(self, policy=None):
+    '''
+    Floor tiles for compound mode, clipped to the interior and trimmed
+    by the floor cuts in a single boolean.
+    '''
+    tools = interior_clip(self)
+
+    if self.render_floor_cuts and self.floor_cuts:
+        tools.append(self.floor_cuts)
+
+    return cq.Workplane("XY").add(cut_shapes([self.interior_tiles], tools, policy))
@@ -24,6 +24,11 @@ def init_floor_cut(self):
 
     self.floor_cuts = None
 
+FLOOR_CUT_PARAMS = (
+    "height", "base_height", "wall_width", "floor_thickness", "floor_tile_height",
+    "floor_cut_panels", "floor_cut_length", "floor_cut_width", "floor_cut_chamfer"
+)
+
 def make_floor_cuts(self):
 
     if self.floor_thickness:
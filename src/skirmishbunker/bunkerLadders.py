@@ -13,6 +13,8 @@
 # limitations under the License.
 
 from cqterrain import Ladder
+from .draft import proxy_box
+from .PrototypeCache import prototype
 
 def init_ladder_params(self):
     self.render_ladders = True
@@ -22,6 +24,15 @@ def init_ladder_params(self):
     self.ladders = None
     self.custom_ladder = None
 
+def build_ladder(bp):
+    bp.make()
+    return bp.build()
+
+LADDER_PARAMS = (
+    "height", "ladder_panels", "ladder_length",
+    "ladder_z_translate", "custom_ladder", "draft"
+)
+
 def make_ladders(self):
     bp = Ladder()
     bp.length = self.ladder_length
@@ -30,8 +41,14 @@ def make_ladders(self):
     if self.custom_ladder:
         self.custom_ladder(self, bp)
 
-    bp.make()
-    ladder = bp.build()
+    if self.draft:
+        ladder = proxy_box(bp.length, bp.width, bp.height)
+    elif self.custom_ladder:
+        # the hook can change anything on the ladder, it isn't shared
+        bp.make()
+        ladder = bp.build()
+    else:
+        ladder = prototype(self, "Ladder", (bp.length, bp.width, bp.height), lambda: build_ladder(bp))
 
     self.ladders = self.make_series(
         ladder,
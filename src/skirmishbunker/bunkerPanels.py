@@ -14,6 +14,9 @@
 
 import cadquery as cq
 from cadqueryhelper import shape
+from .SlotLayout import SlotLayout
+from .draft import proxy_box
+from .PrototypeCache import prototype
 
 def init_bunker_params(self):
     self.render_panel_details=True
@@ -31,6 +34,24 @@ def init_bunker_params(self):
     self.panels = None
     self.cut_panels = None
 
+    # SlotLayout every series places from, rebuilt by make
+    self.layout = None
+
+LAYOUT_PARAMS = ("int_length", "int_width", "panel_length", "panel_padding")
+
+def make_layout(self):
+    self.layout = SlotLayout(
+        self.int_length,
+        self.int_width,
+        self.panel_length,
+        self.panel_padding
+    )
+
+CUT_PANEL_PARAMS = (
+    "length", "width", "height", "angle",
+    "panel_length", "panel_width", "panel_padding"
+)
+
 def make_cut_panels(self):
     height = self.height
     p_length = self.panel_length
@@ -72,6 +93,13 @@ def arch_detail(self):
     panel = panel_outline.intersect(panel_detail).cut(inner_arch).add(inside_arch)
     return panel
 
+DETAIL_PANEL_PARAMS = (
+    "length", "width", "height", "angle",
+    "panel_length", "panel_width", "panel_padding",
+    "arch_padding_top", "arch_padding_sides", "arch_inner_height",
+    "inner_arch_top", "inner_arch_sides", "draft"
+)
+
 def make_detail_panels(self):
     height = self.height
     p_length = self.panel_length
@@ -79,8 +107,22 @@ def make_detail_panels(self):
     padding = self.panel_padding
     p_height = height - padding
 
+    if self.draft:
+        panel = proxy_box(p_length, p_width, p_height)
+    else:
+        panel = prototype(
+            self,
+            "arch_detail",
+            (
+                height, p_length, p_width, padding,
+                self.arch_padding_top, self.arch_padding_sides, self.arch_inner_height,
+                self.inner_arch_top, self.inner_arch_sides
+            ),
+            lambda: arch_detail(self)
+        )
+
     detail_panel = (
-        arch_detail(self)
+        panel
         .translate((0,1*(p_width/2),1*(p_height/2)))
         .rotate((0,0,1),(0,0,0),180)
         .rotate((1,0,0),(0,0,0),self.angle-90)
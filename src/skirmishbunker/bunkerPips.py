@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import cadquery as cq
+from .booleans import resolve_policy, union_all
 
 def init_pip_params(self):
     self.render_pips = False
@@ -23,6 +24,11 @@ def init_pip_params(self):
     self.pips = None
     self.cut_pips = None
 
+PIP_PARAMS = (
+    "length", "width", "height", "inset", "render_magnets",
+    "pip_radius", "pip_height", "pip_padding"
+)
+
 def make_pips(self):
     pip = cq.Workplane("XY").cylinder(self.pip_height, self.pip_radius)
     if self.render_magnets:
@@ -35,16 +41,19 @@ def make_pips(self):
     if self.render_magnets:
         z_translate = self.height/2-self.pip_height/2
 
-    pips = (
-        cq.Workplane("XY")
-        .union(pip.translate((x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, -1*y_translate, z_translate)))
-        .union(pip.translate((x_translate, -1*y_translate, z_translate)))
-
-    )
+    pips = union_all([
+        pip.translate((x_translate, y_translate, z_translate)),
+        pip.translate((-1*x_translate, y_translate, z_translate)),
+        pip.translate((-1*x_translate, -1*y_translate, z_translate)),
+        pip.translate((x_translate, -1*y_translate, z_translate))
+    ], resolve_policy(self))
     self.pips = pips
 
+CUT_PIP_PARAMS = (
+    "length", "width", "height", "base_height",
+    "pip_radius", "pip_height", "pip_padding"
+)
+
 def make_cut_pips(self):
     pip = cq.Workplane("XY").cylinder(self.pip_height, self.pip_radius)
 
@@ -52,11 +61,10 @@ def make_cut_pips(self):
     y_translate = self.width/2-self.pip_radius-self.pip_padding
     z_translate = -1*(self.height/2 + self.base_height - self.pip_height/2)
 
-    pips = (
-        cq.Workplane("XY")
-        .union(pip.translate((x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, y_translate, z_translate)))
-        .union(pip.translate((-1*x_translate, -1*y_translate, z_translate)))
-        .union(pip.translate((x_translate, -1*y_translate, z_translate)))
-    )
+    pips = union_all([
+        pip.translate((x_translate, y_translate, z_translate)),
+        pip.translate((-1*x_translate, y_translate, z_translate)),
+        pip.translate((-1*x_translate, -1*y_translate, z_translate)),
+        pip.translate((x_translate, -1*y_translate, z_translate))
+    ], resolve_policy(self))
     self.cut_pips = pips
@@ -0,0 +1,103 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .SlotLayout import SlotLayout
+from .bunkerBody import calc_interior_size
+from .bunkerWindows import resolve_window_skip
+
+def feature_slots(self, layout):
+    '''
+    Slot indices each rendered feature series lands on, the same
+    skip and keep rules make_series uses.
+    '''
+    features = {"windows":[], "doors":[], "ladders":[], "floor_cuts":[]}
+
+    if self.render_windows:
+        features["windows"] = layout.slots(skip_list=resolve_window_skip(self))
+
+    if self.render_doors:
+        features["doors"] = layout.slots(keep_list=self.door_panels)
+
+    if self.render_ladders:
+        features["ladders"] = layout.slots(keep_list=self.ladder_panels)
+
+    if self.render_floor_cuts:
+        features["floor_cuts"] = layout.slots(keep_list=self.floor_cut_panels)
+
+    return features
+
+def invalid_slots(self, layout):
+    '''
+    Requested indices that don't exist for this size, they are silently dropped by make.
+    '''
+    requested = {
+        "skip_windows":self.skip_windows,
+        "door_panels":self.door_panels,
+        "ladder_panels":self.ladder_panels,
+        "floor_cut_panels":self.floor_cut_panels
+    }
+
+    invalid = {}
+    for name, indices in requested.items():
+        missing = [index for index in indices if index < 0 or index >= len(layout)]
+        if len(missing) > 0:
+            invalid[name] = missing
+
+    return invalid
+
+def roof_hatch_positions(self, layout):
+    if not (self.render_roof and self.render_ladders):
+        return []
+
+    # make_roof hands the interior size to the roof so its hatches share the wall slots
+    x_translate = layout.outer_length / 2 - self.roof_hatch_width / 2
+    y_translate = layout.outer_width / 2 - self.roof_hatch_width / 2
+
+    positions = []
+    for index in layout.slots(keep_list=self.ladder_panels):
+        x, y = layout.centre(index, layout.pitch, x_translate, y_translate)
+        positions.append({"slot":index, "x":x, "y":y})
+
+    return positions
+
+def make_preview(self):
+    int_length, int_width = calc_interior_size(self)
+    layout = SlotLayout(int_length, int_width, self.panel_length, self.panel_padding)
+    features = feature_slots(self, layout)
+
+    assignments = [[] for index in layout.index]
+    for name, indices in features.items():
+        for index in indices:
+            assignments[index].append(name)
+
+    # windows already step around doors and ladders
+    collisions = [
+        {"slot":index, "features":names}
+        for index, names in enumerate(assignments)
+        if len(names) > 1
+    ]
+
+    return {
+        "length":self.length,
+        "width":self.width,
+        "height":self.height,
+        "int_length":int_length,
+        "int_width":int_width,
+        "slots":layout.to_dict(),
+        "features":features,
+        "assignments":assignments,
+        "collisions":collisions,
+        "invalid":invalid_slots(self, layout),
+        "roof_hatches":roof_hatch_positions(self, layout)
+    }
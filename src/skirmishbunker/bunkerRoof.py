@@ -45,6 +45,17 @@ def init_roof_params(self):
     self.roof_body = None
     self.roof_bp = None
 
+ROOF_PARAMS = (
+    "length", "width", "inset", "wall_width", "int_length", "int_width", "corner_chamfer",
+    "roof_object", "roof_height", "roof_inset", "roof_overflow",
+    "roof_chamfer_faces_selector", "roof_chamfer_edges_selector", "roof_chamfer_operation",
+    "render_floor_tiles", "roof_tile_size", "roof_tile_padding", "roof_tile_height",
+    "render_ladders", "ladder_panels", "panel_length", "panel_padding",
+    "roof_hatch_length", "roof_hatch_width", "roof_hatch_radius", "roof_hatch_height",
+    "render_pips", "render_magnets", "pip_radius", "pip_height", "pip_padding",
+    "roof_pip_hole_mod", "instance_series", "draft", "stage_cache", "prototype_cache", "boolean_policy"
+)
+
 def make_roof(self):
     length = self.length - (2 * (self.inset - self.roof_overflow))
     width = self.width - (2 * (self.inset - self.roof_overflow))
@@ -80,6 +91,8 @@ def make_roof(self):
 
     bp.panel_length = self.panel_length
     bp.panel_padding = self.panel_padding
+    bp.instance_series = self.instance_series
+    bp.draft = self.draft
 
     if self.render_pips == True or self.render_magnets == True:
         bp.cut_holes = True
@@ -91,5 +104,10 @@ def make_roof(self):
     bp.hole_inset = self.pip_padding
 
     bp.roof_overflow = self.roof_overflow
+    bp.stage_cache = self.stage_cache
+    bp.prototype_cache = self.prototype_cache
+    bp.incremental = self.incremental
+    bp.instrument = self.instrument
+    bp.boolean_policy = self.boolean_policy
     bp.make()
     self.roof_bp = bp
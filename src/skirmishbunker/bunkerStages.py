@@ -0,0 +1,58 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .stages import Stage
+from .bunkerBody import make_wedge, make_interior_rectangle, make_base, WEDGE_PARAMS, INTERIOR_PARAMS, BASE_PARAMS
+from .bunkerPanels import make_layout, make_cut_panels, make_detail_panels, LAYOUT_PARAMS, CUT_PANEL_PARAMS, DETAIL_PANEL_PARAMS
+from .bunkerWindows import make_cut_windows, make_windows, CUT_WINDOW_PARAMS, WINDOW_PARAMS
+from .bunkerDoors import make_cut_doors, make_doors, CUT_DOOR_PARAMS, DOOR_PARAMS
+from .bunkerRoof import make_roof, ROOF_PARAMS
+from .bunkerFloor import make_interior_floor, FLOOR_PARAMS
+from .bunkerLadders import make_ladders, LADDER_PARAMS
+from .bunkerFloorCuts import make_floor_cuts, FLOOR_CUT_PARAMS
+from .bunkerPips import make_pips, make_cut_pips, PIP_PARAMS, CUT_PIP_PARAMS
+
+# read by Bunker.make_series, the layout itself is keyed on the same params
+SERIES_PARAMS = LAYOUT_PARAMS + ("instance_series",)
+
+# make_series reads the layout stage's output
+SERIES_AFTER = ("layout",)
+
+# order matters
+BUNKER_STAGES = [
+    Stage("wedge", make_wedge, WEDGE_PARAMS, ("wedge",)),
+    Stage("interior", make_interior_rectangle, INTERIOR_PARAMS, ("int_length", "int_width", "interior_rectangle"), parallel=False),
+    Stage("base", make_base, BASE_PARAMS, ("base",), render="render_base"),
+
+    # depends on make_interior_rectangle
+    Stage("layout", make_layout, LAYOUT_PARAMS, ("layout",), cacheable=False, parallel=False),
+
+    # depends on make_layout
+    Stage("cut_panels", make_cut_panels, CUT_PANEL_PARAMS + SERIES_PARAMS, ("cut_panels",), render="render_cut_panels", after=SERIES_AFTER),
+    Stage("detail_panels", make_detail_panels, DETAIL_PANEL_PARAMS + SERIES_PARAMS, ("panels",), render="render_panel_details", after=SERIES_AFTER),
+    Stage("cut_windows", make_cut_windows, CUT_WINDOW_PARAMS + SERIES_PARAMS, ("cut_windows",), render="render_windows", after=SERIES_AFTER),
+    Stage("windows", make_windows, WINDOW_PARAMS + SERIES_PARAMS, ("windows",), render="render_windows", after=SERIES_AFTER),
+    Stage("cut_doors", make_cut_doors, CUT_DOOR_PARAMS + SERIES_PARAMS, ("cut_doors",), render="render_doors", after=SERIES_AFTER),
+    Stage("doors", make_doors, DOOR_PARAMS + SERIES_PARAMS, ("doors",), render="render_doors", after=SERIES_AFTER),
+    Stage("ladders", make_ladders, LADDER_PARAMS + SERIES_PARAMS, ("ladders",), render="render_ladders", after=SERIES_AFTER),
+
+    # the roof is a blueprint object, it caches and tracks its own stages
+    # and is made in this process while the other stages run in parallel
+    Stage("roof", make_roof, ROOF_PARAMS, ("roof_bp",), render="render_roof", cacheable=False, incremental=False, parallel=False),
+
+    Stage("interior_floor", make_interior_floor, FLOOR_PARAMS, ("interior_tiles",), render="render_floor_tiles"),
+    Stage("floor_cuts", make_floor_cuts, FLOOR_CUT_PARAMS + SERIES_PARAMS, ("floor_cuts",), render="render_floor_cuts", after=SERIES_AFTER),
+    Stage("pips", make_pips, PIP_PARAMS, ("pips",), render="render_pips", policy=True),
+    Stage("cut_pips", make_cut_pips, CUT_PIP_PARAMS, ("cut_pips",), render="render_pips", policy=True)
+]
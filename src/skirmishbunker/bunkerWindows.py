@@ -37,6 +37,11 @@ def init_window_params(self):
     self.cut_windows = None
     self.windows = None
 
+WINDOW_SKIP_PARAMS = (
+    "skip_windows", "render_doors", "door_panels",
+    "render_ladders", "ladder_panels"
+)
+
 def resolve_window_skip(self):
     skip_list = [] + self.skip_windows
 
@@ -48,6 +53,12 @@ def resolve_window_skip(self):
 
     return skip_list
 
+CUT_WINDOW_PARAMS = WINDOW_SKIP_PARAMS + (
+    "height", "inset", "wall_width",
+    "window_length", "window_height",
+    "custom_cut_window", "custom_cut_window_padding"
+)
+
 def make_cut_windows(self):
     height = self.height
     cut_width = self.inset+self.wall_width
@@ -69,6 +80,13 @@ def make_cut_windows(self):
         z_translate=-1*(self.panel_padding), skip_list=resolve_window_skip(self), keep_list=None
     )
 
+WINDOW_PARAMS = WINDOW_SKIP_PARAMS + (
+    "height", "inset", "wall_width",
+    "window_length", "window_width", "window_height", "window_width_offset",
+    "window_frame_width", "window_frame_chamfer", "window_frame_chamfer_select",
+    "custom_cut_window", "custom_window", "custom_window_padding"
+)
+
 def make_windows(self):
     height = self.height
     window_width = self.inset
@@ -0,0 +1,58 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from .brep import workplane_shapes
+
+def _bounding_box(part):
+    return cq.Compound.makeCompound(workplane_shapes(part)).BoundingBox()
+
+def proxy_box(length, width, height):
+    '''
+    Plain box in place of a detailed part whose outline is the same centred box.
+    '''
+    return cq.Workplane("XY").box(length, width, height)
+
+def bounding_proxy(part):
+    '''
+    Box filling the bounding box of part, in the same place.
+    '''
+    bb = _bounding_box(part)
+
+    return (
+        cq.Workplane("XY")
+        .box(bb.xlen, bb.ylen, bb.zlen)
+        .translate(bb.center)
+    )
+
+def grid_proxy(part, dim, columns, rows):
+    '''
+    One slab covering what grid.make_grid(part, dim, columns, rows) would,
+    rows run along x and columns along y, centred on the origin.
+    None for an empty grid.
+    '''
+    if columns <= 0 or rows <= 0:
+        return None
+
+    bb = _bounding_box(part)
+
+    return (
+        cq.Workplane("XY")
+        .box(
+            bb.xlen + (rows - 1) * dim[0],
+            bb.ylen + (columns - 1) * dim[1],
+            bb.zlen
+        )
+        .translate(bb.center)
+    )
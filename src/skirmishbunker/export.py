@@ -0,0 +1,300 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Tessellate the parts of a build across a process pool and write them
+as one file per part, one merged file, or both.
+
+report = export_blueprint(bp, folder="stl", path="stl/bunker.3mf", quality="print")
+'''
+
+import cadquery as cq
+import os
+import time
+from OCP.TopLoc import TopLoc_Location
+from .Bunker import Bunker
+from .FlatRoof import FlatRoof
+from .booleans import collect_shapes
+from .parallelStages import make_stage_executor
+from .tessellation import (
+    Mesh, tessellate, tessellate_packed, pack_shape, location_matrix, write_stl,
+    resolve_quality, part_tolerances
+)
+from .threemf import write_3mf
+
+FORMATS = ("stl", "3mf")
+
+def blueprint_parts(bp):
+    '''
+    Named parts of a made Bunker, roof, Catwalk or door, built ready for export.
+    A Bunker's parts are named after its stages and laid out as on the print plate.
+    '''
+    if isinstance(bp, Bunker):
+        return bp.build_export_parts()
+
+    if isinstance(bp, FlatRoof):
+        return {"roof":bp.build()}
+
+    return {type(bp).__name__.lower():bp.build()}
+
+def blueprint_quality(bp):
+    '''
+    Per part tolerance overrides of a Bunker, roof, Catwalk or door, from its export_quality.
+    '''
+    overrides = dict(getattr(bp, "export_quality", None) or {})
+
+    if isinstance(bp, Bunker) and bp.render_roof and bp.roof_bp and "roof" not in overrides:
+        roof = blueprint_quality(bp.roof_bp)
+        if "roof" in roof:
+            overrides["roof"] = roof["roof"]
+
+    # hatch rings are fused into the roof so the whole roof needs the detail tolerances
+    if isinstance(bp, FlatRoof) and bp.render_hatches and "roof" not in overrides:
+        overrides["roof"] = "detail"
+
+    return overrides
+
+def find_prototypes(parts):
+    '''
+    Break each part into solids and group the ones that are the same solid
+    at a different location, such as instance_series copies, so each is meshed once.
+    Returns the unlocated prototypes and, per part, (prototype index, location matrix) pairs.
+    '''
+    prototypes = []
+    buckets = {}
+    instances = {}
+
+    for name, part in parts.items():
+        instances[name] = []
+
+        for shape in collect_shapes([part]):
+            bare = shape.wrapped.Located(TopLoc_Location())
+            bucket = buckets.setdefault(hash(bare), [])
+
+            index = None
+            for candidate in bucket:
+                if prototypes[candidate].wrapped.IsEqual(bare):
+                    index = candidate
+                    break
+
+            if index is None:
+                index = len(prototypes)
+                prototypes.append(cq.Shape.cast(bare))
+                bucket.append(index)
+
+            instances[name].append((index, location_matrix(shape)))
+
+    return prototypes, instances
+
+def mesh_jobs(prototypes, instances, tolerances):
+    '''
+    One (prototype, tolerance, angular_tolerance) job per prototype and tolerance pair
+    the parts use it at, with instances pointing at job indexes instead of prototypes.
+    '''
+    keys = {}
+    jobs = []
+    placed_jobs = {}
+
+    for name, placed in instances.items():
+        tolerance, angular_tolerance = tolerances[name]
+        placed_jobs[name] = []
+
+        for index, matrix in placed:
+            key = (index, tolerance, angular_tolerance)
+            if key not in keys:
+                keys[key] = len(jobs)
+                jobs.append((prototypes[index], tolerance, angular_tolerance))
+
+            placed_jobs[name].append((keys[key], matrix))
+
+    return jobs, placed_jobs
+
+def tessellate_prototypes(jobs, workers=None, executor=None):
+    '''
+    (Mesh, seconds) for each (shape, tolerance, angular_tolerance) job, on executor or a pool of workers.
+    workers=1 runs in this process.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if executor is None and (workers <= 1 or len(jobs) <= 1):
+        results = []
+        for prototype, tolerance, angular_tolerance in jobs:
+            start = time.perf_counter()
+            mesh = tessellate(prototype, tolerance, angular_tolerance)
+            results.append((mesh, time.perf_counter() - start))
+        return results
+
+    pool = executor or make_stage_executor(min(workers, len(jobs)))
+    try:
+        futures = [
+            pool.submit(tessellate_packed, pack_shape(prototype), tolerance, angular_tolerance)
+            for prototype, tolerance, angular_tolerance in jobs
+        ]
+        return [future.result() for future in futures]
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+def part_mesh(placed, meshes):
+    '''
+    One mesh with every placed prototype mesh moved into place.
+    '''
+    mesh = Mesh()
+    for index, matrix in placed:
+        mesh.extend(meshes[index], matrix)
+    return mesh
+
+def prototype_names(instances):
+    '''
+    Name each prototype after the first part using it.
+    '''
+    names = {}
+    for name, placed in instances.items():
+        unique = list(dict.fromkeys(index for index, _ in placed))
+        for count, index in enumerate(unique):
+            if index not in names:
+                names[index] = name if len(unique) == 1 else f"{name}_{count}"
+    return names
+
+def write_mesh_file(path, instances, meshes, names):
+    '''
+    Write the parts in instances, the format comes from the extension.
+    STL repeats every placed triangle, 3MF writes each prototype mesh
+    once and places it with components.
+    '''
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+
+    if extension == "stl":
+        write_stl(path, [part_mesh(placed, meshes) for placed in instances.values()])
+    elif extension == "3mf":
+        used = list(dict.fromkeys(index for placed in instances.values() for index, _ in placed))
+        remap = {index: position for position, index in enumerate(used)}
+
+        write_3mf(
+            path,
+            [(names[index], meshes[index]) for index in used],
+            [
+                (name, [(remap[index], matrix) for index, matrix in placed])
+                for name, placed in instances.items()
+            ]
+        )
+    else:
+        raise Exception(f"Unsupported export format {extension}, expected one of {FORMATS}")
+
+def _make_folder(path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+def export_parts(
+    parts, folder=None, path=None, file_format="stl",
+    quality="standard", part_quality=None,
+    workers=None, executor=None
+):
+    '''
+    Tessellate the named parts in parallel, then write each to folder/<name>.<file_format>
+    and, when path is given, all of them merged into path.
+    quality is a tessellation.Quality or preset name, part_quality maps part names
+    to overrides, see tessellation.part_tolerances.
+    Returns per part solid, triangle and timing counts, unique_triangles is what a 3MF holds.
+    '''
+    if folder is None and path is None:
+        raise Exception("export_parts needs a folder, a path or both")
+
+    if file_format not in FORMATS:
+        raise Exception(f"Unsupported export format {file_format}, expected one of {FORMATS}")
+
+    quality = resolve_quality(quality)
+    part_quality = part_quality or {}
+
+    start = time.perf_counter()
+    parts = {name: part for name, part in parts.items() if part is not None}
+    tolerances = {name: part_tolerances(quality, part_quality.get(name)) for name in parts}
+
+    prototypes, instances = find_prototypes(parts)
+    jobs, instances = mesh_jobs(prototypes, instances, tolerances)
+
+    step = time.perf_counter()
+    results = tessellate_prototypes(jobs, workers, executor)
+    tessellate_seconds = time.perf_counter() - step
+
+    meshes = [mesh for mesh, _ in results]
+    names = prototype_names(instances)
+    records = []
+    counted = set()
+
+    for name, placed in instances.items():
+        seconds = 0
+        unique = set()
+
+        for index, _ in placed:
+            unique.add(index)
+
+            # a prototype shared between parts is timed against the first
+            if index not in counted:
+                counted.add(index)
+                seconds += results[index][1]
+
+        record = {
+            "part":name,
+            "solids":len(placed),
+            "unique_solids":len(unique),
+            "triangles":sum(meshes[index].triangle_count() for index, _ in placed),
+            "unique_triangles":sum(meshes[index].triangle_count() for index in unique),
+            "tolerance":tolerances[name][0],
+            "angular_tolerance":tolerances[name][1],
+            "tessellate_seconds":seconds,
+            "write_seconds":None,
+            "output":None
+        }
+
+        if folder is not None:
+            output = os.path.join(folder, f"{name}.{file_format}")
+            _make_folder(output)
+
+            step = time.perf_counter()
+            write_mesh_file(output, {name:placed}, meshes, names)
+            record["write_seconds"] = time.perf_counter() - step
+            record["output"] = output
+
+        records.append(record)
+
+    report = {
+        "parts":records,
+        "output":None,
+        "write_seconds":None,
+        "tessellate_seconds":tessellate_seconds,
+        "seconds":None
+    }
+
+    if path is not None:
+        _make_folder(path)
+
+        step = time.perf_counter()
+        write_mesh_file(path, instances, meshes, names)
+        report["write_seconds"] = time.perf_counter() - step
+        report["output"] = path
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+def export_blueprint(bp, folder=None, path=None, part_quality=None, **kwargs):
+    '''
+    export_parts for the parts of a made Bunker, roof, Catwalk or door.
+    part_quality overrides are layered over the blueprint's export_quality.
+    '''
+    overrides = blueprint_quality(bp)
+    overrides.update(part_quality or {})
+    return export_parts(blueprint_parts(bp), folder, path, part_quality=overrides, **kwargs)
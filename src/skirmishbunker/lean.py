@@ -0,0 +1,76 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+from functools import wraps
+from .brep import workplane_size
+
+def release_stages(owner, stages):
+    '''
+    Drop the workplanes the stages made, with their incremental snapshots
+    and any builds memoized from them. The owner needs a make before it builds again.
+    '''
+    for stage in stages:
+        for name in stage.outputs:
+            if isinstance(getattr(owner, name, None), cq.Workplane):
+                setattr(owner, name, None)
+
+        owner.stage_snapshots.pop(stage.name, None)
+
+    memo = getattr(owner, "build_memo", None)
+    if memo:
+        memo.clear()
+
+    owner.released = True
+
+def stage_memory(owner, stages):
+    '''
+    Binary BREP size of the workplanes each stage holds, a stand in for their memory.
+    '''
+    report = []
+
+    for stage in stages:
+        size = 0
+        for name in stage.outputs:
+            value = getattr(owner, name, None)
+            if isinstance(value, cq.Workplane):
+                size += workplane_size(value)
+
+        report.append({"owner":type(owner).__name__, "stage":stage.name, "bytes":size})
+
+    return report
+
+def lean_build(method):
+    '''
+    Decorator for build methods. Refuses to build from released shapes and,
+    with owner.lean set, releases them once the outermost build returns.
+    '''
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.released:
+            raise Exception(f"{type(self).__name__} shapes were released, call make before building")
+
+        # builds call each other, only the outermost one releases
+        self._build_depth = getattr(self, "_build_depth", 0) + 1
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            self._build_depth -= 1
+
+        if self.lean and self._build_depth == 0:
+            self.release()
+
+        return result
+
+    return wrapper
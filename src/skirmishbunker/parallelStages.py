@@ -0,0 +1,177 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .brep import pack_value, unpack_value
+from .booleans import resolve_policy
+from .stages import is_current, snapshot, stage_key, run_measured_stage
+from .Instrument import Instrument
+
+def make_stage_executor(workers=None):
+    '''
+    Process pool for Bunker.stage_executor. Starting workers is slow,
+    keep one pool for every make rather than one per make.
+    '''
+    # spawn so workers don't inherit OCC thread state from a fork
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+def run_remote_stage(owner_type, stage, values, measure=False):
+    '''
+    Worker side, make one stage on a fresh owner holding only the values it reads.
+    '''
+    owner = owner_type()
+    for name, value in values.items():
+        setattr(owner, name, unpack_value(value))
+
+    record = None
+    if measure:
+        instrument = Instrument(count_topology=False)
+        instrument.measure(owner, "stage", stage.name, lambda: stage.make(owner), ())
+        record = instrument.records[0]
+    else:
+        stage.make(owner)
+
+    outputs = {name: pack_value(getattr(owner, name, None)) for name in stage.outputs}
+    return outputs, record
+
+def stage_requirements(stages):
+    '''
+    For each stage the names of the earlier stages whose outputs its params or after read.
+    '''
+    producers = {}
+    requirements = {}
+
+    for stage in stages:
+        reads = stage.params + stage.after
+        requirements[stage.name] = {producers[name] for name in reads if name in producers}
+
+        for output in stage.outputs:
+            producers[output] = stage.name
+
+    return requirements
+
+def submit_stage(owner, stage, executor, measure):
+    '''
+    Future for the stage running on executor,
+    None when it has to run in this process.
+    '''
+    if not stage.parallel:
+        return None
+
+    values = {name: pack_value(getattr(owner, name, None)) for name in stage.params + stage.after}
+
+    # a worker has its own default_policy, send the one this process resolves
+    values["boolean_policy"] = resolve_policy(owner)
+    arguments = (type(owner), stage, values, measure)
+
+    try:
+        # lambdas and local functions used as custom hooks can't be sent to a worker
+        pickle.dumps(arguments)
+    except Exception:
+        return None
+
+    return executor.submit(run_remote_stage, *arguments)
+
+def cached_key(owner, stage):
+    cache = getattr(owner, "stage_cache", None)
+
+    if cache and stage.cacheable:
+        return stage_key(cache, owner, stage)
+
+    return None
+
+def apply_remote_stage(owner, stage, result):
+    outputs, record = result
+
+    for name, value in outputs.items():
+        setattr(owner, name, unpack_value(value))
+
+    key = cached_key(owner, stage)
+    if key:
+        owner.stage_cache.store(key, {name: getattr(owner, name) for name in stage.outputs})
+
+    instrument = getattr(owner, "instrument", None)
+    if instrument and record:
+        record["depth"] = instrument.depth
+        record["worker"] = True
+        instrument.add(record, [getattr(owner, name, None) for name in stage.outputs])
+
+def cache_has(owner, stage):
+    key = cached_key(owner, stage)
+    return key is not None and owner.stage_cache.contains(key)
+
+def run_stages_parallel(owner, stages, executor):
+    '''
+    run_stages, with the stages that don't read each other's outputs
+    made at the same time on executor. Stage inputs and outputs travel as binary BREP.
+    '''
+    incremental = getattr(owner, "incremental", False)
+    measure = getattr(owner, "instrument", None) is not None
+
+    waiting = [stage for stage in stages if stage.enabled(owner)]
+    requirements = stage_requirements(waiting)
+    running = {}
+    done = set()
+
+    def finish(stage):
+        if incremental:
+            owner.stage_snapshots[stage.name] = snapshot(owner, stage)
+        done.add(stage.name)
+
+    try:
+        while waiting or running:
+            for future in [future for future in running if future.done()]:
+                stage = running.pop(future)
+                apply_remote_stage(owner, stage, future.result())
+                finish(stage)
+
+            ready = [stage for stage in waiting if requirements[stage.name] <= done]
+            local = []
+
+            for stage in ready:
+                waiting.remove(stage)
+
+                # only checked once everything it reads is made, like run_stages
+                if incremental and is_current(owner, stage):
+                    done.add(stage.name)
+                    continue
+
+                future = None
+                if not cache_has(owner, stage):
+                    future = submit_stage(owner, stage, executor, measure)
+
+                if future is None:
+                    local.append(stage)
+                else:
+                    running[future] = stage
+
+            # in this process while the workers get on with theirs
+            for stage in local:
+                run_measured_stage(owner, stage)
+                finish(stage)
+
+            if len(ready) > 0:
+                continue
+
+            if len(running) > 0:
+                wait(list(running), return_when=FIRST_COMPLETED)
+            elif len(waiting) > 0:
+                raise Exception(f"Stages {[stage.name for stage in waiting]} wait on stages that never run")
+    except BaseException:
+        for future in running:
+            future.cancel()
+        raise
@@ -0,0 +1,175 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Frozen, hashable snapshots of the parameters of a Bunker, roof, Catwalk or door.
+
+before = blueprint_params(bp)
+bp.door_panels = [1]
+changed = blueprint_params(bp).diff(before)
+'''
+
+import cadquery as cq
+from .brep import TRANSIENT_STATE
+
+# run time state, not configuration
+STATE_FIELDS = TRANSIENT_STATE + ("stage_cache", "stage_snapshots", "released")
+
+_fields = {}
+
+def hook_key(key):
+    '''
+    Decorator declaring the key a custom hook is snapshotted and cached under,
+    so closures and lambdas compare by what they do instead of by identity.
+    StageCache also hashes the hook's source file, but not the values a closure
+    captures or other files it calls, version the key when those change.
+    '''
+    def declare(function):
+        function.param_key = key
+        return function
+
+    return declare
+
+def hook_value(hook):
+    '''
+    The declared key of a custom hook, its module and name when it has one,
+    otherwise None and the hook compares by identity.
+    '''
+    key = getattr(hook, "param_key", None)
+    if key is not None:
+        return key
+
+    name = f"{getattr(hook, '__module__', '')}.{getattr(hook, '__qualname__', '')}"
+    if "<" in name:
+        return None
+
+    return name
+
+def freeze_value(value):
+    '''
+    Hashable, immutable copy of a parameter value.
+    '''
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_value(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze_value(item)) for key, item in value.items()))
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze_value(item) for item in value)
+
+    # shapes compare by identity
+    if isinstance(value, (cq.Workplane, cq.Shape)):
+        return value
+
+    if callable(value):
+        key = hook_value(value)
+        return value if key is None else ("hook", key)
+
+    # a nested blueprint by its own parameters
+    if hasattr(value, "make") and hasattr(value, "build"):
+        return blueprint_params(value)
+
+    # small settings objects such as BooleanPolicy
+    if hasattr(value, "__dict__"):
+        return (type(value).__qualname__, freeze_value(vars(value)))
+
+    return value
+
+def param_fields(bp):
+    '''
+    Names of the parameters of bp's class: everything a fresh instance sets,
+    less run time state and the shapes make fills in. Worked out once per class.
+    '''
+    cls = type(bp)
+    if cls not in _fields:
+        stages = getattr(cls, "stages", ())
+        read = {param for stage in stages for param in stage.params}
+
+        # outputs a later stage reads as a param, like int_length, are parameters too
+        shapes = {output for stage in stages for output in stage.outputs if output not in read}
+        shapes.update(getattr(cls, "shape_fields", ()))
+
+        _fields[cls] = tuple(sorted(
+            name for name in vars(cls()) if name not in STATE_FIELDS and name not in shapes
+        ))
+
+    return _fields[cls]
+
+class ParamSnapshot:
+    '''
+    Immutable parameter values of one blueprint, hashed once.
+    '''
+    __slots__ = ("kind", "names", "values", "_hash")
+
+    def __init__(self, kind, names, values):
+        object.__setattr__(self, "kind", kind)
+        object.__setattr__(self, "names", names)
+        object.__setattr__(self, "values", values)
+        object.__setattr__(self, "_hash", hash((kind, names, values)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ParamSnapshot is immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, ParamSnapshot):
+            return NotImplemented
+
+        return (
+            self._hash == other._hash
+            and self.kind == other.kind
+            and self.names == other.names
+            and self.values == other.values
+        )
+
+    def __getitem__(self, name):
+        return self.values[self.names.index(name)]
+
+    def __repr__(self):
+        return f"ParamSnapshot({self.kind}, {len(self.names)} params)"
+
+    def as_dict(self):
+        return dict(zip(self.names, self.values))
+
+    def diff(self, other):
+        '''
+        {name: (this value, other value)} for every parameter that differs,
+        missing parameters show up as None.
+        '''
+        mine = self.as_dict()
+        theirs = other.as_dict()
+        changed = {}
+
+        for name in mine.keys() | theirs.keys():
+            value = mine.get(name)
+            other_value = theirs.get(name)
+            if value != other_value:
+                changed[name] = (value, other_value)
+
+        return changed
+
+def blueprint_params(bp):
+    '''
+    ParamSnapshot of bp. make fills in computed values such as Bunker.int_length,
+    so compare snapshots taken on the same side of make.
+    '''
+    names = param_fields(bp)
+    values = tuple(freeze_value(getattr(bp, name, None)) for name in names)
+    return ParamSnapshot(type(bp).__name__, names, values)
@@ -0,0 +1,160 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Raise or sink a pattern of flat faces on a planar face of a solid without
+a boolean. A general fuse has to split the host face against every edge of
+every tile, which grows much faster than the tile count. Here the host face
+is rebuilt with a hole per tile, one prism makes all the tile walls and the
+faces are assembled straight into a shell, so the cost follows the area.
+'''
+
+import cadquery as cq
+from OCP.BRep import BRep_Builder
+from OCP.BRepBuilderAPI import BRepBuilderAPI_MakeFace, BRepBuilderAPI_MakeSolid
+from OCP.BRepClass import BRepClass_FaceClassifier
+from OCP.BRepPrimAPI import BRepPrimAPI_MakePrism
+from OCP.ShapeFix import ShapeFix_Face
+from OCP.TopAbs import TopAbs_IN
+from OCP.TopoDS import TopoDS, TopoDS_Shell
+
+TOLERANCE = 1e-6
+
+def pattern_faces(pattern):
+    if isinstance(pattern, cq.Workplane):
+        pattern = [shape for shape in pattern.vals() if isinstance(shape, cq.Shape)]
+
+    faces = []
+    for shape in pattern:
+        faces.extend(shape.Faces())
+    return faces
+
+def find_host(solid, faces, z):
+    '''
+    The single planar face of solid at height z, facing up or down,
+    whose area holds every face of the pattern.
+    '''
+    hosts = []
+    for face in solid.Faces():
+        if face.geomType() != "PLANE" or abs(abs(face.normalAt().z) - 1) > TOLERANCE:
+            continue
+
+        if abs(face.Center().z - z) > TOLERANCE:
+            continue
+
+        hosts.append(face)
+
+    if len(hosts) != 1:
+        return None
+
+    host = hosts[0]
+    if len(host.innerWires()) > 0:
+        return None
+
+    for face in faces:
+        if not inside(host, face):
+            return None
+
+    return host
+
+def inside(host, face):
+    # strictly inside a convex host, the volume check catches anything else
+    box = face.BoundingBox()
+    z = (box.zmin + box.zmax) / 2
+
+    for x in (box.xmin, box.xmax):
+        for y in (box.ymin, box.ymax):
+            classifier = BRepClass_FaceClassifier(host.wrapped, cq.Vector(x, y, z).toPnt(), TOLERANCE)
+            if classifier.State() != TopAbs_IN:
+                return False
+
+    return True
+
+def _facing(face, normal):
+    if face.normalAt().dot(normal) < 0:
+        return cq.Face(face.wrapped.Reversed())
+    return face
+
+def relief(solid, placements, height):
+    '''
+    placements is a list of (host, faces) where host is a planar face of solid and
+    faces lie on it, inside it and clear of each other. Every face is raised by
+    height along the host normal, or sunk when height is negative.
+
+    Returns (solid, tops) with the top face made from each input face,
+    or None when the result doesn't check out and a boolean should be used.
+    '''
+    if len(solid.Solids()) != 1:
+        return None
+
+    shell_faces = []
+    tops = []
+    replaced = set()
+    expected = solid.Volume()
+
+    for host, faces in placements:
+        normal = host.normalAt()
+        replaced.add(host)
+
+        # the host keeps its outline with a hole for every tile
+        host_face = BRepBuilderAPI_MakeFace(host.wrapped)
+        for face in faces:
+            host_face.Add(face.outerWire().wrapped)
+
+        fix = ShapeFix_Face(host_face.Face())
+        fix.FixOrientation()
+        shell_faces.append(_facing(cq.Face(fix.Face()), normal))
+
+        # tile holes show the host through them
+        for face in faces:
+            for wire in face.innerWires():
+                island = cq.Face(BRepBuilderAPI_MakeFace(wire.wrapped, True).Face())
+                shell_faces.append(_facing(island, normal))
+
+        pattern = cq.Compound.makeCompound(faces)
+        prism = BRepPrimAPI_MakePrism(pattern.wrapped, (normal * height).wrapped)
+        base = set(faces)
+
+        for face in cq.Shape.cast(prism.Shape()).Faces():
+            if face in base:
+                continue
+
+            # walls face out of the raised tiles or into the sunken pockets
+            if height < 0:
+                face = cq.Face(face.wrapped.Reversed())
+            shell_faces.append(face)
+
+        tops.append([cq.Face(TopoDS.Face_s(prism.LastShape(face.wrapped))) for face in faces])
+        expected += height * sum(face.Area() for face in faces)
+
+    shell_faces.extend(face for face in solid.Faces() if face not in replaced)
+
+    builder = BRep_Builder()
+    shell = TopoDS_Shell()
+    builder.MakeShell(shell)
+    for face in shell_faces:
+        builder.Add(shell, face.wrapped)
+    shell.Closed(True)
+
+    result = cq.Solid(BRepBuilderAPI_MakeSolid(shell).Solid())
+    volume = result.Volume()
+
+    if volume < 0:
+        result = cq.Solid(result.wrapped.Reversed())
+        volume = -volume
+
+    if abs(volume - expected) > max(TOLERANCE, expected * TOLERANCE):
+        return None
+
+    return result, tops
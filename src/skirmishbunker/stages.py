@@ -0,0 +1,156 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .booleans import resolve_policy
+
+class Stage:
+    def __init__(self, name, make, params=(), outputs=(), render=None, cacheable=True, incremental=True, parallel=True, after=(), policy=False):
+        self.name = name
+
+        # callable taking the owning object
+        self.make = make
+
+        # attributes the stage reads and writes
+        self.params = tuple(params)
+        self.outputs = tuple(outputs)
+
+        # optional flag attribute that turns the stage on or off
+        self.render = render
+        self.cacheable = cacheable
+
+        # False when the stage has inputs params can't describe and has to rerun every make
+        self.incremental = incremental
+
+        # False keeps the stage in the calling process under run_stages_parallel,
+        # for cheap stages and outputs that can't travel as BREP
+        self.parallel = parallel
+
+        # outputs of earlier stages read beyond the ones params name,
+        # not keyed on, only used to order stages
+        self.after = tuple(after)
+
+        # True when make runs booleans under resolve_policy(owner),
+        # the resolved BooleanPolicy is then keyed on like a param
+        self.policy = policy
+
+    def enabled(self, owner):
+        if self.render is None:
+            return True
+
+        return bool(getattr(owner, self.render))
+
+def snapshot_value(value):
+    '''
+    Copy containers so an in place edit like skip_windows.append(3)
+    still shows up as a change. Everything else compares with ==,
+    which for blueprint objects and workplanes is identity.
+    '''
+    if isinstance(value, (list, tuple)):
+        return tuple(snapshot_value(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted((key, snapshot_value(item)) for key, item in value.items()))
+
+    return value
+
+def params_snapshot(owner, params):
+    return tuple(snapshot_value(getattr(owner, param, None)) for param in params)
+
+def stage_policy(owner, stage):
+    return resolve_policy(owner) if stage.policy else None
+
+def snapshot(owner, stage):
+    return params_snapshot(owner, stage.params) + (stage_policy(owner, stage),)
+
+def stage_key(cache, owner, stage):
+    return cache.key(owner, stage.name, stage.params, stage_policy(owner, stage))
+
+def is_current(owner, stage):
+    if not stage.incremental:
+        return False
+
+    snapshots = getattr(owner, "stage_snapshots", None)
+    if snapshots is None or stage.name not in snapshots:
+        return False
+
+    try:
+        return snapshots[stage.name] == snapshot(owner, stage)
+    except Exception:
+        # values that refuse to compare are treated as changed
+        return False
+
+def run_stage(owner, stage):
+    cache = getattr(owner, "stage_cache", None)
+    key = None
+
+    if cache and stage.cacheable:
+        key = stage_key(cache, owner, stage)
+
+    if key:
+        outputs = cache.load(key)
+        if outputs is not None:
+            for name, value in outputs.items():
+                setattr(owner, name, value)
+            return
+
+    stage.make(owner)
+
+    if key:
+        cache.store(key, {name: getattr(owner, name) for name in stage.outputs})
+
+def run_stages(owner, stages):
+    incremental = getattr(owner, "incremental", False)
+
+    for stage in stages:
+        if not stage.enabled(owner):
+            continue
+
+        if incremental and is_current(owner, stage):
+            continue
+
+        run_measured_stage(owner, stage)
+
+        if incremental:
+            owner.stage_snapshots[stage.name] = snapshot(owner, stage)
+
+def run_measured_stage(owner, stage):
+    instrument = getattr(owner, "instrument", None)
+    if instrument:
+        instrument.measure(owner, "stage", stage.name, lambda: run_stage(owner, stage), stage.outputs)
+    else:
+        run_stage(owner, stage)
+
+def memoized(owner, name, params, build, *extra):
+    '''
+    Result of build() kept on owner.build_memo until one of params,
+    or anything in extra, changes. Stage outputs compare by identity so
+    a make that reruns a stage also invalidates the result.
+    '''
+    if not getattr(owner, "memoize_builds", False):
+        return build()
+
+    current = params_snapshot(owner, params) + tuple(extra)
+    entry = owner.build_memo.get(name)
+
+    if entry is not None:
+        try:
+            if entry[0] == current:
+                return entry[1]
+        except Exception:
+            # values that refuse to compare are treated as changed
+            pass
+
+    result = build()
+    owner.build_memo[name] = (current, result)
+    return result
@@ -0,0 +1,221 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cadquery as cq
+import math
+import struct
+import time
+from array import array
+from OCP.BRep import BRep_Tool
+from OCP.BRepMesh import BRepMesh_IncrementalMesh
+from OCP.BRepTools import BRepTools
+from OCP.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+from OCP.TopExp import TopExp_Explorer
+from OCP.TopLoc import TopLoc_Location
+from OCP.TopoDS import TopoDS
+from .brep import workplane_to_bin, bin_to_workplane
+
+# cadquery's export defaults
+DEFAULT_TOLERANCE = 0.1
+DEFAULT_ANGULAR_TOLERANCE = 0.1
+
+class Quality:
+    '''
+    Tessellation tolerances for plain parts and for parts with small curved details.
+    '''
+    def __init__(self, tolerance, angular_tolerance, detail_tolerance=None, detail_angular_tolerance=None):
+        # absolute deflection in mm and the largest angle in radians between neighbouring facets
+        # flat faces mesh to the same few triangles whatever these are
+        self.tolerance = tolerance
+        self.angular_tolerance = angular_tolerance
+
+        # for handle rings, hatches and other small curves, None uses the plain values
+        self.detail_tolerance = tolerance if detail_tolerance is None else detail_tolerance
+        self.detail_angular_tolerance = angular_tolerance if detail_angular_tolerance is None else detail_angular_tolerance
+
+QUALITY_PRESETS = {
+    "preview":Quality(0.5, 0.8, 0.2, 0.4),
+    "standard":Quality(DEFAULT_TOLERANCE, 0.3, DEFAULT_TOLERANCE, DEFAULT_ANGULAR_TOLERANCE),
+    "print":Quality(0.05, 0.2, 0.02, 0.05)
+}
+
+def resolve_quality(quality):
+    '''
+    A Quality or the name of one of QUALITY_PRESETS.
+    '''
+    if isinstance(quality, Quality):
+        return quality
+
+    if quality not in QUALITY_PRESETS:
+        raise Exception(f"Unknown tessellation quality {quality}, expected one of {tuple(QUALITY_PRESETS)}")
+
+    return QUALITY_PRESETS[quality]
+
+def part_tolerances(quality, override=None):
+    '''
+    (tolerance, angular_tolerance) for a part. override is None for the plain values of quality,
+    "detail" for its detail values, a preset name, a Quality or a (tolerance, angular_tolerance) pair.
+    '''
+    if override is None:
+        quality = resolve_quality(quality)
+        return (quality.tolerance, quality.angular_tolerance)
+
+    if override == "detail":
+        quality = resolve_quality(quality)
+        return (quality.detail_tolerance, quality.detail_angular_tolerance)
+
+    if isinstance(override, (tuple, list)):
+        return (float(override[0]), float(override[1]))
+
+    return part_tolerances(override)
+
+_stl_record = struct.Struct("<12fH")
+
+class Mesh:
+    '''
+    Indexed triangles, vertices as flat x, y, z runs.
+    '''
+    def __init__(self, vertices=None, triangles=None):
+        self.vertices = array("d") if vertices is None else vertices
+        self.triangles = array("i") if triangles is None else triangles
+
+    def vertex_count(self):
+        return len(self.vertices) // 3
+
+    def triangle_count(self):
+        return len(self.triangles) // 3
+
+    def extend(self, other, matrix=None):
+        '''
+        Append other, moved by a 3x4 row major matrix when given.
+        '''
+        offset = self.vertex_count()
+
+        if matrix is None:
+            self.vertices.extend(other.vertices)
+        else:
+            self.vertices.extend(transform_vertices(other.vertices, matrix))
+
+        self.triangles.extend(index + offset for index in other.triangles)
+
+def location_matrix(shape):
+    '''
+    3x4 row major matrix of a shape's location, None for the identity.
+    '''
+    location = shape.wrapped.Location()
+    if location.IsIdentity():
+        return None
+
+    trsf = location.Transformation()
+    return [trsf.Value(row, column) for row in range(1, 4) for column in range(1, 5)]
+
+def transform_vertices(vertices, matrix):
+    m = matrix
+    moved = array("d")
+
+    for i in range(0, len(vertices), 3):
+        x, y, z = vertices[i], vertices[i + 1], vertices[i + 2]
+        moved.append(m[0] * x + m[1] * y + m[2] * z + m[3])
+        moved.append(m[4] * x + m[5] * y + m[6] * z + m[7])
+        moved.append(m[8] * x + m[9] * y + m[10] * z + m[11])
+
+    return moved
+
+def tessellate(shape, tolerance=DEFAULT_TOLERANCE, angular_tolerance=DEFAULT_ANGULAR_TOLERANCE):
+    '''
+    Mesh of a cq.Shape in its own coordinates, tolerance is an absolute deflection in mm.
+    '''
+    # a shared solid keeps the triangulation of an earlier mesh, which would win over these tolerances
+    BRepTools.Clean_s(shape.wrapped)
+    BRepMesh_IncrementalMesh(shape.wrapped, tolerance, False, angular_tolerance, True)
+
+    mesh = Mesh()
+    explorer = TopExp_Explorer(shape.wrapped, TopAbs_FACE)
+
+    while explorer.More():
+        face = TopoDS.Face_s(explorer.Current())
+        explorer.Next()
+
+        location = TopLoc_Location()
+        triangulation = BRep_Tool.Triangulation_s(face, location)
+        if triangulation is None:
+            continue
+
+        trsf = location.Transformation()
+        offset = mesh.vertex_count() - 1
+
+        for i in range(1, triangulation.NbNodes() + 1):
+            point = triangulation.Node(i).Transformed(trsf)
+            mesh.vertices.extend((point.X(), point.Y(), point.Z()))
+
+        # keep the winding pointing out of the solid
+        reverse = face.Orientation() == TopAbs_REVERSED
+        for i in range(1, triangulation.NbTriangles() + 1):
+            a, b, c = triangulation.Triangle(i).Get()
+            if reverse:
+                b, c = c, b
+            mesh.triangles.extend((a + offset, b + offset, c + offset))
+
+    return mesh
+
+def tessellate_packed(data, tolerance, angular_tolerance):
+    '''
+    Worker side tessellate of a shape packed with brep.workplane_to_bin.
+    '''
+    start = time.perf_counter()
+    shape = bin_to_workplane(data).val()
+    mesh = tessellate(shape, tolerance, angular_tolerance)
+    return mesh, time.perf_counter() - start
+
+def pack_shape(shape):
+    return workplane_to_bin(cq.Workplane("XY").add(shape))
+
+def stl_records(mesh):
+    '''
+    Binary STL triangle records, normals worked out from the winding.
+    '''
+    records = bytearray()
+    v = mesh.vertices
+    t = mesh.triangles
+
+    for i in range(0, len(t), 3):
+        a, b, c = t[i] * 3, t[i + 1] * 3, t[i + 2] * 3
+        ax, ay, az = v[a], v[a + 1], v[a + 2]
+        bx, by, bz = v[b], v[b + 1], v[b + 2]
+        cx, cy, cz = v[c], v[c + 1], v[c + 2]
+
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        wx, wy, wz = cx - ax, cy - ay, cz - az
+        nx, ny, nz = uy * wz - uz * wy, uz * wx - ux * wz, ux * wy - uy * wx
+        length = math.sqrt(nx * nx + ny * ny + nz * nz) or 1
+
+        records += _stl_record.pack(
+            nx / length, ny / length, nz / length,
+            ax, ay, az, bx, by, bz, cx, cy, cz, 0
+        )
+
+    return bytes(records)
+
+def write_stl(path, meshes):
+    '''
+    One binary STL holding every mesh.
+    '''
+    records = [stl_records(mesh) for mesh in meshes]
+    count = sum(mesh.triangle_count() for mesh in meshes)
+
+    with open(path, "wb") as stl_file:
+        stl_file.write(b"skirmishbunker".ljust(80, b" "))
+        stl_file.write(struct.pack("<I", count))
+        for data in records:
+            stl_file.write(data)
@@ -0,0 +1,111 @@
+# Copyright 2023 James Adams
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+'''
+
+RELATIONSHIPS = '''<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+'''
+
+MODEL_NAMESPACE = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+
+def _number(value):
+    return format(value, ".9g")
+
+def mesh_xml(mesh):
+    lines = ["<mesh>", "<vertices>"]
+
+    v = mesh.vertices
+    for i in range(0, len(v), 3):
+        lines.append(f'<vertex x="{_number(v[i])}" y="{_number(v[i + 1])}" z="{_number(v[i + 2])}"/>')
+
+    lines.append("</vertices>")
+    lines.append("<triangles>")
+
+    t = mesh.triangles
+    for i in range(0, len(t), 3):
+        lines.append(f'<triangle v1="{t[i]}" v2="{t[i + 1]}" v3="{t[i + 2]}"/>')
+
+    lines.append("</triangles>")
+    lines.append("</mesh>")
+    return "\n".join(lines)
+
+def _transform(matrix):
+    # 3MF multiplies row vectors, so the rotation goes in transposed
+    m = matrix
+    return " ".join(_number(value) for value in (
+        m[0], m[4], m[8],
+        m[1], m[5], m[9],
+        m[2], m[6], m[10],
+        m[3], m[7], m[11]
+    ))
+
+def write_3mf(path, meshes, parts=None):
+    '''
+    meshes is a list of (name, Mesh). Without parts each mesh is a named object on the build plate.
+    parts is a list of (name, [(mesh index, 3x4 matrix or None)]), each part is a named
+    object made of components that place the shared meshes, so a repeated mesh is written once.
+    '''
+    resources = []
+    items = []
+
+    for object_id, (name, mesh) in enumerate(meshes, start=1):
+        resources.append(f'<object id="{object_id}" name={quoteattr(name)} type="model">\n{mesh_xml(mesh)}\n</object>')
+
+        if parts is None:
+            items.append(f'<item objectid="{object_id}"/>')
+
+    for part_id, (name, placed) in enumerate(parts or [], start=len(meshes) + 1):
+        components = []
+        for index, matrix in placed:
+            if matrix is None:
+                components.append(f'<component objectid="{index + 1}"/>')
+            else:
+                components.append(f'<component objectid="{index + 1}" transform="{_transform(matrix)}"/>')
+
+        resources.append("\n".join([
+            f'<object id="{part_id}" name={quoteattr(name)} type="model">',
+            "<components>",
+            *components,
+            "</components>",
+            "</object>"
+        ]))
+        items.append(f'<item objectid="{part_id}"/>')
+
+    model = "\n".join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<model unit="millimeter" xml:lang="en-US" xmlns="{MODEL_NAMESPACE}">',
+        "<resources>",
+        *resources,
+        "</resources>",
+        "<build>",
+        *items,
+        "</build>",
+        "</model>"
+    ])
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        archive.writestr("3D/3dmodel.model", model)